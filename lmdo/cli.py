@@ -6,10 +6,10 @@ Usage:
     lmdo init config
     lmdo env export
     lmdo bp fetch <url> [--config=<config-file.yaml>]
-    lmdo cf (create|update|delete) [-c | --change_set] [-he | --hide-event] [--stack=<stackName>] [--config=<config-file.yaml>]
-    lmdo lm (create|update|delete|package) [--function=<functionName>] [--config=<config-file.yaml>]
-    lmdo cwe (create|update|delete) [--config=<config-file.yaml>]
-    lmdo api (create|update|delete) [--config=<config-file.yaml>]
+    lmdo cf (create|update|delete) [-c | --change_set] [-he | --hide-event] [--stack=<stackName>] [--force] [--config=<config-file.yaml>]
+    lmdo lm (create|update|delete|package) [--function=<functionName>] [--jobs=<int>] [--no-cache] [--analyze] [--force] [--config=<config-file.yaml>]
+    lmdo cwe (create|update|delete) [--force] [--config=<config-file.yaml>]
+    lmdo api (create|update|delete) [--force] [--config=<config-file.yaml>]
     lmdo api create-stage <from_stage> <to_stage> [--config=<config-file.yaml>]
     lmdo api delete-stage <from_stage> [--config=<config-file.yaml>]
     lmdo api create-domain <domain_name> <cert_name> <cert_path> <cert_private_key_path> <cert_chain_path> [--config=<config-file.yaml>]
@@ -19,8 +19,9 @@ Usage:
     lmdo s3 sync [--config=<config-file.yaml>]
     lmdo logs tail function <function_name> [-f | --follow] [--day=<int>] [--start-date=<datetime>] [--end-date=<datetime>] [--config=<config-file.yaml>]
     lmdo logs tail <log_group_name> [-f | --follow] [--day=<int>] [--start-date=<datetime>] [--end-date=<datetime>] [--config=<config-file.yaml>]
-    lmdo deploy [--config=<config-file.yaml>]
+    lmdo deploy [--jobs=<int>] [--no-cache] [--force] [--config=<config-file.yaml>]
     lmdo destroy [--config=<config-file.yaml>]
+    lmdo plan [--function=<functionName>] [--stack=<stackName>] [--config=<config-file.yaml>]
     lmdo (-h | --help)
     lmdo --version
 
@@ -34,6 +35,10 @@ Options:
     --function=<functioName>       Lambda function name
     --group-name=<groupName>       Cloudwatch log group name
     -he --hide-event               Hide CloudFormation event output
+    --jobs=<int>                   Number of parallel workers [default: 1]
+    --no-cache                     Rebuild Lambda packages instead of using the local build cache
+    --analyze                      Report what takes space in Lambda packages
+    --force                        Deploy resources even if unchanged since last deploy
     --config=<config-file.yaml>    Custom lmdo configuration file                  
 """
 
@@ -91,6 +96,9 @@ def main():
     elif args.get('destroy'):
         from lmdo.cmds.destroy.destroy_client import DestroyClient
         client_factory = DestroyClient(args)
+    elif args.get('plan'):
+        from lmdo.cmds.plan.plan_client import PlanClient
+        client_factory = PlanClient(args)
 
     if client_factory:
         client_factory.execute()
@@ -0,0 +1,76 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+
+class ClientPool(object):
+    """
+    Process wide boto3 sessions and clients, one session per
+    credentials or profile and one client per service of it.
+    Creating them from a session isn't thread safe so it's
+    locked, clients themselves are shared between threads
+    """
+    _lock = threading.RLock()
+    _pid = None
+    _sessions = {}
+    _clients = {}
+    _account_ids = {}
+
+    @classmethod
+    def get_key(cls, session_kwargs):
+        return tuple(sorted(session_kwargs.items()))
+
+    @classmethod
+    def reset_if_forked(cls):
+        """Connections can't be shared with a forked worker"""
+        if cls._pid != os.getpid():
+            cls.clear()
+            cls._pid = os.getpid()
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._sessions = {}
+            cls._clients = {}
+            cls._account_ids = {}
+
+    @classmethod
+    def get_session(cls, **session_kwargs):
+        """Shared session for credentials or profile"""
+        key = cls.get_key(session_kwargs)
+        with cls._lock:
+            cls.reset_if_forked()
+            if key not in cls._sessions:
+                cls._sessions[key] = boto3.Session(**session_kwargs)
+
+            return cls._sessions[key]
+
+    @classmethod
+    def get_client(cls, service, max_pool_connections=None, **session_kwargs):
+        """Shared client of a service"""
+        key = (cls.get_key(session_kwargs), service, max_pool_connections)
+        with cls._lock:
+            session = cls.get_session(**session_kwargs)
+            if key not in cls._clients:
+                cls._clients[key] = session.client(service, config=Config(max_pool_connections=max_pool_connections))
+
+            return cls._clients[key]
+
+    @classmethod
+    def get_resource(cls, service, max_pool_connections=None, **session_kwargs):
+        """New resource from shared session, resources aren't thread safe"""
+        with cls._lock:
+            return cls.get_session(**session_kwargs).resource(service, config=Config(max_pool_connections=max_pool_connections))
+
+    @classmethod
+    def get_account_id(cls, max_pool_connections=None, **session_kwargs):
+        """Account of the credentials, looked up once"""
+        key = cls.get_key(session_kwargs)
+        if key not in cls._account_ids:
+            account_id = cls.get_client('sts', max_pool_connections, **session_kwargs).get_caller_identity()['Account']
+            with cls._lock:
+                cls._account_ids[key] = account_id
+
+        return cls._account_ids[key]
@@ -5,10 +5,13 @@ import site
 import datetime
 import json
 
+from botocore.exceptions import ClientError
+
 from lmdo.cmds.aws_base import AWSBase
 from lmdo.cmds.iam.iam import IAM
 from lmdo.cmds.lm.aws_lambda import AWSLambda
 from lmdo.oprint import Oprint
+from lmdo.deploy_state import DeployState
 from lmdo.config import SWAGGER_DIR, SWAGGER_FILE, PROJECT_CONFIG_FILE, APIGATEWAY_SWAGGER_WSGI
 from lmdo.utils import update_template, get_template
 from lmdo.convertors.stack_var_convertor import StackVarConvertor
@@ -22,6 +25,7 @@ class Apigateway(AWSBase):
     def __init__(self):
         super(Apigateway, self).__init__()
         self._client = self.get_client('apigateway')
+        self._state = self.get_deploy_state()
         self.convert_config()
 
     @property
@@ -50,11 +54,19 @@ class Apigateway(AWSBase):
             Oprint.info('No action for api gateway, skip...', 'apigateway')
             sys.exit(0)
 
+        state_key = 'api:{}'.format(self.get_apigateway_name())
+        digest = self.get_api_hash()
+        if self._state.if_unchanged(state_key, digest) and self.if_api_exist_by_name(self.get_apigateway_name()):
+            Oprint.info('API {} is unchanged since last deploy, skip'.format(self.get_apigateway_name()), 'apigateway')
+            return True
+
         swagger_api = self.create_api_by_swagger()
         swagger_api = self.create_wsgi_api()
         if swagger_api:
             self.create_deployment(swagger_api.get('id'), self._config.get('Stage'), swagger_api.get('name'))
 
+        self._state.put(state_key, digest)
+
     def update(self):
         """Update"""
         self.create()
@@ -84,6 +96,19 @@ class Apigateway(AWSBase):
     def delete_mapping(self):
         self.delete_base_path_mapping(self._args.get('<domain_name>'), self._args.get('<base_path>'))
  
+    def get_api_hash(self):
+        """Hash of swagger template, its variables and wsgi functions"""
+        contents = []
+        files = [self.get_swagger_template()] + ['{}/{}'.format(SWAGGER_DIR, file_name) for file_name in (self._config.get('ApiVarMapToFile') or {}).values()]
+        for file_path in files:
+            if os.path.isfile(file_path):
+                with open(file_path, 'r') as f:
+                    contents.append([file_path, f.read()])
+
+        functions = [lm for lm in self._config.get('Lambda') or [] if lm.get('Type') == AWSLambda.FUNCTION_TYPE_WSGI]
+
+        return DeployState.get_hash(contents, self._config.get('ApiVarMapToVar'), functions, self._config.get('Stage'))
+
     def get_swagger_template(self):
         """Return swagger template path"""
         return './{}/{}'.format(SWAGGER_DIR, SWAGGER_FILE)
@@ -170,6 +195,16 @@ class Apigateway(AWSBase):
             return True
 
         api = self.if_api_exist_by_name(self.get_apigateway_name())
+        body = self.get_swagger_body()
+
+        if not api:
+            return self.import_rest_api(body)
+        else:
+            # Always overwrite for update
+            return self.put_rest_api(api.get('id'), body, 'overwrite')
+
+    def get_swagger_body(self):
+        """Swagger template with lmdo variables replaced"""
         with open(self.get_swagger_template(), 'r') as outfile:
             to_replace = {
                 "$title": self.get_apigateway_name(),
@@ -189,15 +224,48 @@ class Apigateway(AWSBase):
                 for var_name, replacement in var_to_var.iteritems():
                     to_replace[var_name] = replacement
                     
-            body = update_template(outfile.read(), to_replace)
+            return update_template(outfile.read(), to_replace)
 
-            if not api:
-                return self.import_rest_api(body)
-            else:
-                # Always overwrite for update
-                return self.put_rest_api(api.get('id'), body, 'overwrite')
+    def get_plan_items(self):
+        """Resources to compare with what is deployed, for plan"""
+        if not self.get_apigateway_name():
+            return []
 
-        return False
+        return [('api', self.get_apigateway_name(), self.plan_api)]
+
+    @classmethod
+    def get_swagger_operations(cls, swagger):
+        """Path and method pairs defined in swagger"""
+        methods = ['get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'x-amazon-apigateway-any-method']
+        return sorted([(path, method) for path, operations in (swagger.get('paths') or {}).items() for method in operations if method in methods])
+
+    def plan_api(self):
+        """Compare API paths and methods with deployed stage"""
+        api = self.if_api_exist_by_name(self.get_apigateway_name())
+        if not api:
+            return 'create', []
+
+        changes = []
+        if os.path.isfile(self.get_swagger_template()):
+            try:
+                export = self._client.get_export(restApiId=api.get('id'), stageName=self._config.get('Stage'), exportType='swagger')
+            except ClientError:
+                return 'update', ['stage {} not deployed'.format(self._config.get('Stage'))]
+
+            if self.get_swagger_operations(json.loads(self.get_swagger_body())) != self.get_swagger_operations(json.loads(export['body'].read())):
+                changes.append('paths')
+
+        paths = []
+        for response in self._client.get_paginator('get_resources').paginate(restApiId=api.get('id')):
+            paths += [item.get('path') for item in response.get('items')]
+
+        for lm_func in self._config.get('Lambda') or []:
+            if lm_func.get('Type') == AWSLambda.FUNCTION_TYPE_WSGI and not lm_func.get('DisableApiGateway'):
+                base_path = '/' + (lm_func.get('ApiBasePath') or '/res').strip('/')
+                if base_path not in paths:
+                    changes.append('wsgi {}'.format(lm_func.get('FunctionName')))
+
+        return ('update' if changes else 'unchanged'), changes
             
     def create_deployment(self, api_id, stage_name='dev', api_name=None, **kwargs):
         """Create a stage deployment to internet"""
@@ -1,8 +1,9 @@
-import boto3
-
 from lmdo.cli import args
 from lmdo.lmdo_config import lmdo_config
 from lmdo.oprint import Oprint
+from lmdo.deploy_state import DeployState
+from lmdo.client_pool import ClientPool
+from lmdo.config import AWS_MAX_POOL_CONNECTIONS
 
 class AWSBase(object):
     """base AWS delegator class"""
@@ -27,8 +28,8 @@ class AWSBase(object):
     def config(self, config_parser):
         self._config = config_parser
 
-    def get_session(self):
-        """Fetch AWS session based on AWS CLI credential setup"""
+    def get_session_kwargs(self):
+        """AWS session arguments based on AWS CLI credential setup"""
         kw = {}
         if self._config.get('AWSKey') and self._config.get('AWSSecret') and self._config.get('Region'):
             kw['aws_access_key_id'] = self._config.get('AWSKey')
@@ -47,7 +48,18 @@ class AWSBase(object):
 
             kw['profile_name'] = self._profile_name
 
-        return boto3.Session(**kw)
+        return kw
+
+    def get_session(self):
+        """Fetch shared AWS session"""
+        return ClientPool.get_session(**self.get_session_kwargs())
+
+    def get_max_pool_connections(self):
+        return int(self._config.get('MaxPoolConnections') or AWS_MAX_POOL_CONNECTIONS)
+
+    def get_deploy_state(self):
+        """What was last deployed to this stage and region"""
+        return DeployState('{}:{}'.format(self.get_name_id(), self.get_region()), force=bool(self._args.get('--force')))
 
     def get_region(self):
         """Get region name from AWS profile"""
@@ -55,15 +67,15 @@ class AWSBase(object):
 
     def get_account_id(self):
         """Get account ID"""
-        return self.get_session().client('sts').get_caller_identity()['Account']
+        return ClientPool.get_account_id(self.get_max_pool_connections(), **self.get_session_kwargs())
 
     def get_client(self, client_type):
-        """Fetch AWS service client"""
-        return self.get_session().client(client_type)
+        """Fetch shared AWS service client"""
+        return ClientPool.get_client(client_type, self.get_max_pool_connections(), **self.get_session_kwargs())
 
     def get_resource(self, resource_type):
         """Fetch AWS service resource"""
-        return self.get_session().resource(resource_type)
+        return ClientPool.get_resource(resource_type, self.get_max_pool_connections(), **self.get_session_kwargs())
 
     def get_name_id(self):
         return "{}-{}-{}".format(
@@ -79,9 +91,16 @@ class AWSBase(object):
         
         return "{}-{}".format(self.get_name_id(), name.lower())
 
-    def get_template_s3_url(self, template_name):
+    def get_template_s3_key(self, template_name, stack_name=None):
+        """S3 key of uploaded template, under the stack using it if given"""
+        if stack_name:
+            return '{}/{}/{}'.format(self.get_name_id(), stack_name, template_name)
+
+        return '{}/{}'.format(self.get_name_id(), template_name)
+
+    def get_template_s3_url(self, template_name, stack_name=None):
         """Construct the template URL for nested stack"""
-        return 'https://s3.amazonaws.com/{}/{}/{}'.format(self._config.get('CloudFormation').get('S3Bucket'), self.get_name_id(), template_name)
+        return 'https://s3.amazonaws.com/{}/{}'.format(self._config.get('CloudFormation').get('S3Bucket'), self.get_template_s3_key(template_name, stack_name))
 
     def get_policy_arn(self, policy_name):
         """Fetch policy arn"""
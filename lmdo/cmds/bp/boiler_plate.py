@@ -9,6 +9,7 @@ from git import Repo
 
 from lmdo.config import PROJECT_CONFIG_FILE
 from lmdo.oprint import Oprint
+from lmdo.path_filter import PathFilter
 from lmdo.utils import mkdir, get_sitepackage_dirs, copytree
 from lmdo.spinner import spinner
 
@@ -61,7 +62,7 @@ class BoilerPlate(object):
 
             tmp = tempfile.mkdtemp()
             self.git_clone(self._args.get('<url>'), tmp)
-            copytree(tmp, './', ignore=shutil.ignore_patterns('*.git*'))
+            copytree(tmp, './', ignore=PathFilter(['*.git*']).copytree_ignore(tmp))
             shutil.rmtree(tmp)
             
             spinner.stop()
@@ -1,5 +1,6 @@
 
 from lmdo.cmds.cf.cloudformation import Cloudformation
+from lmdo.cmds.s3.s3 import S3
 from lmdo.cmds.commands import Dispatcher, CreateCommand, UpdateCommand, DeleteCommand
 from lmdo.cmds.client_factory import ClientFactory
 
@@ -13,8 +14,10 @@ class CfClient(ClientFactory):
     def execute(self):
         if self._args.get('create'):
             self._dispatcher.run(CreateCommand(self._cloudformation))
+            S3.stats.report()
         elif self._args.get('update'):
             self._dispatcher.run(UpdateCommand(self._cloudformation))
+            S3.stats.report()
         elif self._args.get('delete'):
             self._dispatcher.run(DeleteCommand(self._cloudformation))
         else:
@@ -10,13 +10,21 @@ from botocore.exceptions import ClientError
 
 from lmdo.cmds.aws_base import AWSBase
 from lmdo.cmds.s3.s3 import S3
+from lmdo.cmds.scheduler import Scheduler
 from lmdo.oprint import Oprint
-from lmdo.config import CLOUDFORMATION_STACK_LOCK_POLICY, CLOUDFORMATION_STACK_UNLOCK_POLICY
-from lmdo.utils import find_files_by_postfix, find_files_by_name_only, get_template, sys_pause
-from lmdo.waiters.cloudformation_waiters import CloudformationWaiterStackCreate, CloudformationWaiterStackUpdate, CloudformationWaiterStackDelete, CloudformationWaiterChangeSetCreateComplete
+from lmdo.config import CLOUDFORMATION_STACK_LOCK_POLICY, CLOUDFORMATION_STACK_UNLOCK_POLICY, CLOUDFORMATION_VALIDATE_JOBS
+from lmdo.utils import find_files_by_postfix, find_files_by_name_only, get_template, sys_pause, parallel_map
+from lmdo.waiters.cloudformation_waiters import CloudformationWaiterChangeSetCreateComplete
 from lmdo.cmds.cf.cf_status import CfStatus
+from lmdo.cmds.cf.stack_watcher import StackWatcher
+from lmdo.cmds.cf.validation_cache import ValidationCache
+from lmdo.cmds.cf.template_linter import TemplateLinter
 from lmdo.utc import utc
 from lmdo.resolvers import ParamsResolver, TemplatesResolver
+from lmdo.convertors.stack_var_convertor import StackVarConvertor
+from lmdo.convertors.nested_template_url_convertor import NestedTemplateUrlConvertor
+from lmdo.file_loader import FileLoader
+from lmdo.deploy_state import DeployState
 
 
 class Cloudformation(AWSBase):
@@ -33,6 +41,10 @@ class Cloudformation(AWSBase):
         self._s3 = S3()
         self._stack_info_cache = {}
         self.current_event_timestamp = (datetime.datetime.now(utc) - datetime.timedelta(seconds=3))
+        # One watcher follows all stacks being changed
+        self._watcher = StackWatcher(self._client, since=self.current_event_timestamp, show_events=not self.if_hide_event(), display=self.display_stack_event)
+        self._state = self.get_deploy_state()
+        self._validation_cache = ValidationCache(scope=self.get_region())
     
     @property
     def client(self):
@@ -61,14 +73,11 @@ class Cloudformation(AWSBase):
             Oprint.info('No cloudformation found, skip', self.NAME)
             return True
 
-        for stack in self._config.get('CloudFormation').get('Stacks'):
-            # If only for specified stack
-            specified_stack = self.if_specify_stack()
-            if specified_stack and specified_stack != stack.get('Name'):
-                continue
+        # Stacks are deleted before the stacks they use
+        self.get_scheduler(self.delete_stack_by_config).reverse().run()
 
-            stack_name = self.get_lmdo_format_name(stack.get('Name'), stack.get('DisablePrefix', False))
-            self.delete_stack(stack_name)
+    def delete_stack_by_config(self, stack):
+        return self.delete_stack(self.get_lmdo_format_name(stack.get('Name'), stack.get('DisablePrefix', False)))
 
     def update(self):
         """Wrapper, same action as create"""
@@ -78,37 +87,209 @@ class Cloudformation(AWSBase):
         """If user specify a stack to process"""
         return False if not self._args.get('--stack') else self._args.get('--stack')
 
-    def prepare(self, templates, bucket=None):
-        """Prepare all templates/validate/upload before create and update"""
+    def get_selected_stacks(self):
+        """Configured stacks the command is for"""
+        specified_stack = self.if_specify_stack()
+
+        return [stack for stack in self._config.get('CloudFormation').get('Stacks') if not specified_stack or specified_stack == stack.get('Name')]
+
+    def get_stack_files(self, stack):
+        """Raw template and parameter files of a stack, nested templates included"""
+        files = []
+        if stack.get('TemplatePath') and os.path.isfile(stack.get('TemplatePath')):
+            files.append(stack.get('TemplatePath'))
+
+        if stack.get('ParamsPath'):
+            files += ParamsResolver(params_path=stack.get('ParamsPath')).get_list()
+
+        repo_path = self._config.get('CloudFormation').get('TemplateRepoPath') or './'
+        for file_path in list(files):
+            with open(file_path, 'r') as f:
+                for found in NestedTemplateUrlConvertor.match(f.read()):
+                    header, template_name = found.split('|')
+                    if os.path.isfile(template_name):
+                        files.append(template_name)
+                    elif os.path.isdir(repo_path):
+                        files += FileLoader.find_files_by_names(search_path=repo_path, only_files=[template_name])[:1]
+
+        return files
+
+    def get_stack_dependencies(self, stacks):
+        """
+        Names of configured stacks whose outputs each stack
+        reads with $stack|name::key, by stack Name
+        """
+        names = dict([(self.get_lmdo_format_name(stack.get('Name'), stack.get('DisablePrefix', False)), stack.get('Name')) for stack in stacks])
+        convertor = StackVarConvertor()
+
+        dependencies = {}
+        for stack in stacks:
+            requires = set()
+            for file_path in self.get_stack_files(stack):
+                with open(file_path, 'r') as f:
+                    for stack_name in convertor.get_stack_names_and_keys(f.read()):
+                        # Stacks outside of the config must exist already
+                        if names.get(stack_name) and names.get(stack_name) != stack.get('Name'):
+                            requires.add(names.get(stack_name))
+
+            dependencies[stack.get('Name')] = sorted(requires)
+
+        return dependencies
+
+    def get_scheduler(self, func):
+        """Run func for each selected stack once stacks it reads from are done"""
+        stacks = self.get_selected_stacks()
+        dependencies = self.get_stack_dependencies(stacks)
+
+        scheduler = Scheduler()
+        for stack in stacks:
+            scheduler.add(stack.get('Name'), lambda stack=stack: func(stack), dependencies[stack.get('Name')])
+
+        return scheduler
+
+    def get_plan_items(self):
+        """Resources to compare with what is deployed, for plan"""
+        if not self._config.get('CloudFormation'):
+            return []
+
+        return [('stack', self.get_lmdo_format_name(stack.get('Name'), stack.get('DisablePrefix', False)), lambda stack=stack: self.plan_stack(stack)) \
+            for stack in self.get_selected_stacks()]
+
+    def plan_stack(self, stack):
+        """
+        Compare rendered templates and parameters with deployed stack,
+        children are compared with the ones uploaded by last deploy
+        """
+        stack_name = self.get_lmdo_format_name(stack.get('Name'), stack.get('DisablePrefix', False))
+        repo_path = self._config.get('CloudFormation').get('TemplateRepoPath')
+        stack_info = self.get_stack(stack_name=stack_name)
+
+        params = ParamsResolver(params_path=stack.get('ParamsPath'), stack_name=stack_name).resolve() if stack.get('ParamsPath') else []
+        templates = TemplatesResolver(template_path=stack.get('TemplatePath'), params_path=stack.get('ParamsPath'), repo_path=repo_path, stack_name=stack_name).resolve()
+        try:
+            with open(templates['master'], 'r') as outfile:
+                template_body = outfile.read()
+
+            child_changes = self.plan_child_templates(templates['children'], stack_name) if stack_info else []
+        finally:
+            shutil.rmtree(templates['tmp_dir'])
+
+        if not stack_info:
+            return 'create', []
+
+        changes = []
+        live_body = self._client.get_template(StackName=stack_name)['TemplateBody']
+        # JSON templates come back parsed
+        if isinstance(live_body, dict):
+            try:
+                same_template = json.loads(template_body) == live_body
+            except ValueError:
+                same_template = False
+        else:
+            same_template = template_body.strip() == live_body.strip()
+
+        if not same_template:
+            changes.append('template')
+
+        live_params = dict([(param['ParameterKey'], param.get('ParameterValue')) for param in stack_info['Stacks'][0].get('Parameters') or []])
+        for param in params:
+            value = live_params.get(param['ParameterKey'])
+            # NoEcho values can't be compared
+            if value != '****' and value != param.get('ParameterValue'):
+                changes.append('parameter {}'.format(param['ParameterKey']))
+
+        if child_changes is None:
+            if not changes:
+                return 'unknown', ['Child templates can\'t be compared without S3Bucket']
+        else:
+            changes.extend(child_changes)
+
+        return ('update' if changes else 'unchanged'), changes
+
+    def plan_child_templates(self, children, stack_name):
+        """Changed child templates, None if they can't be compared"""
+        if not children:
+            return []
+
+        bucket = self._config.get('CloudFormation').get('S3Bucket')
+        if not bucket:
+            return None
+
+        changes = []
+        for child in children:
+            template_name = os.path.basename(child)
+            key = self.get_template_s3_key(template_name, stack_name)
+            if not self._s3.if_object_unchanged(bucket, key, self._s3.get_content_hashes(child)):
+                changes.append('template {}'.format(template_name))
+
+        return changes
+
+    def lint_templates(self, stack_name, templates, params, bucket=None):
+        """Check templates offline before anything is uploaded"""
+        if self._config.get('CloudFormation').get('Lint') is False:
+            return True
+
+        linter = TemplateLinter(templates, params=params, via_s3=bool(bucket))
+        passed = linter.lint()
+        for warning in linter.warnings:
+            Oprint.warn(warning, self.NAME)
+
+        if not passed:
+            for error in linter.errors:
+                Oprint.err(error, self.NAME, exit=False)
+
+            shutil.rmtree(templates['tmp_dir'])
+            Oprint.err('Stack {} has {} template errors, nothing was deployed'.format(stack_name, len(linter.errors)), self.NAME)
+
+        return True
+
+    def prepare(self, templates, bucket=None, stack_name=None):
+        """
+        Prepare all templates/validate/upload before create and update,
+        templates of a stack are uploaded under its own folder
+        """
         if len(templates['children']) > 0 and not bucket:
             Oprint.err('S3 bucket hasn\'t been provided for nested template', self.NAME)
 
         # Validate syntax of the template
-        with open(templates['master'], 'r') as outfile:
-            self.validate_template(outfile.read())
+        template_bodies = []
+        for template in [templates['master']] + templates['children']:
+            with open(template, 'r') as outfile:
+                template_bodies.append(outfile.read())
 
-        for child_template in templates['children']:
-            with open(child_template, 'r') as outfile:
-                self.validate_template(outfile.read())
+        self.validate_templates(template_bodies)
 
         # If bucket provided, we upload
         # all templates into the subfolder
         if bucket:
             path, template_name = os.path.split(templates['master'])
-            self._s3.upload_file(bucket, templates['master'], "{}/{}".format(self.get_name_id(), template_name))
+            self._s3.upload_file(bucket, templates['master'], self.get_template_s3_key(template_name, stack_name))
 
             for child_template in templates['children']:
                 path, template_name = os.path.split(child_template)
-                self._s3.upload_file(bucket, child_template, "{}/{}".format(self.get_name_id(), template_name))
+                self._s3.upload_file(bucket, child_template, self.get_template_s3_key(template_name, stack_name))
+
+        return True
+
+    def validate_templates(self, template_bodies):
+        """Validate templates not validated before, concurrently"""
+        template_bodies = [body for body in template_bodies if not self._validation_cache.if_valid(body)]
+        parallel_map(self.validate_template, template_bodies, CLOUDFORMATION_VALIDATE_JOBS)
 
         return True
 
     def validate_template(self, template_body):
-        """Validate template via content"""
+        """Validate template via content, valid ones are cached"""
+        if self._validation_cache.if_valid(template_body):
+            return True
+
         try:
             result = self._client.validate_template(TemplateBody=template_body)
         except Exception as e:
             Oprint.err(e, self.NAME)
+
+        self._validation_cache.put(template_body)
+
         return True
 
     def get_stack(self, stack_name, cached=False):
@@ -127,98 +308,126 @@ class Cloudformation(AWSBase):
             s3_bucket = self._config.get('CloudFormation').get('S3Bucket')
             repo_path = self._config.get('CloudFormation').get('TemplateRepoPath')
 
-            specified_stack_found = False
-            for stack in self._config.get('CloudFormation').get('Stacks'):
-                # If only for specified stack
-                specified_stack = self.if_specify_stack()
-                if specified_stack and specified_stack != stack.get('Name'):
-                    continue
-                else:
-                    specified_stack_found = True
-
-                func_params = {}
-
-                params_path = stack.get('ParamsPath')
-                if params_path:
-                    func_params['Parameters'] = ParamsResolver(params_path=params_path).resolve()
-                
-                stack_name = self.get_lmdo_format_name(stack.get('Name'), stack.get('DisablePrefix', False))
-                
-                templates = TemplatesResolver(template_path=stack.get('TemplatePath'), params_path=params_path, repo_path=repo_path).resolve()
-                
-                self.prepare(templates=templates, bucket=s3_bucket)
-
-                to_update = False
-                stack_info = self.get_stack(stack_name=stack_name)
-
-                if stack_info:
-                    # You can't do much with UPDATE_ROLLBACK_FAILED state
-                    if stack_info['Stacks'][0]['StackStatus'] == 'UPDATE_ROLLBACK_FAILED':
-                        Oprint.warn('State {} is in a very bad state, lmdo cannot do anything. Please refer to {} for action you can take'.format(
-                          stack_name,
-                          'https://aws.amazon.com/blogs/devops/continue-rolling-back-an-update-for-aws-cloudformation-stacks-in-the-update_rollback_failed-state/'), 
-                          self.NAME)
-
-                        continue
-
-                    # You cannot update a stack with status ROLLBACK_COMPLETE during creation
-                    if stack_info['Stacks'][0]['StackStatus'] == 'ROLLBACK_COMPLETE':
-                        Oprint.warn('Stack {} exited with bad state ROLLBACK_COMPLETE during last attempt to create. Required to be removed first'.format(stack_name), self.NAME)
-                        self.delete_stack(stack_name, no_policy=True)
-                    else:
-                        to_update = True
-
-                if not s3_bucket:
-                    # Read master template data into cache
-                    with open(templates['master'], 'r') as outfile:
-                        template_body = outfile.read()
-
-                    func_params['TemplateBody'] = template_body
-                else:
-                    path, template_name = os.path.split(templates['master'])
-                    func_params['TemplateURL'] = self.get_template_s3_url(template_name)
-
-                if to_update:
-                    if self._args.get('-c') or self._args.get('--change_set'):
-                        self.stack_update_via_change_set(stack_name=stack_name, **func_params)
-                    else:
-                        self.update_stack(stack_name, **func_params)
-                else:
-                    self.create_stack(stack_name, **func_params)
-
-                # Remove temporary template dir
-                shutil.rmtree(templates['tmp_dir'])
-            
+            # Make sure bucket exists before stacks upload concurrently
+            if s3_bucket and self.get_selected_stacks():
+                self._s3.ensure_bucket(s3_bucket)
+
+            # Change sets ask for confirmation, one stack at a time
+            jobs = 1 if self._args.get('-c') or self._args.get('--change_set') else None
+            self.get_scheduler(lambda stack: self.process_stack(stack, s3_bucket, repo_path)).run(jobs)
+
             # If specified stack name and none matched
-            if self.if_specify_stack() and not specified_stack_found:
+            if self.if_specify_stack() and not self.get_selected_stacks():
                 Oprint.warn('Cannot find specified stack {} in lmdo config'.format(self.if_specify_stack()), self.NAME)
 
+    def process_stack(self, stack, s3_bucket, repo_path):
+        """Create or update a configured stack"""
+        func_params = {}
+        stack_name = self.get_lmdo_format_name(stack.get('Name'), stack.get('DisablePrefix', False))
+
+        params_path = stack.get('ParamsPath')
+        if params_path:
+            func_params['Parameters'] = ParamsResolver(params_path=params_path, stack_name=stack_name).resolve()
+
+        templates = TemplatesResolver(template_path=stack.get('TemplatePath'), params_path=params_path, repo_path=repo_path, stack_name=stack_name).resolve()
+
+        state_key = 'stack:{}'.format(stack_name)
+        digest = self.get_stack_hash(templates, s3_bucket, func_params)
+        if self.if_stack_unchanged(stack_name, state_key, digest):
+            Oprint.info('Stack {} is unchanged since last deploy, skip'.format(stack_name), self.NAME)
+            shutil.rmtree(templates['tmp_dir'])
+            return True
+
+        deployed = self.deploy_stack(stack_name, templates, s3_bucket, func_params)
+
+        if deployed:
+            self._state.put(state_key, digest)
+
+        return deployed
+
+    def get_stack_hash(self, templates, s3_bucket, func_params):
+        """Hash of rendered templates and resolved parameters"""
+        contents = []
+        for template in [templates['master']] + templates['children']:
+            with open(template, 'r') as f:
+                contents.append([os.path.basename(template), f.read()])
+
+        return DeployState.get_hash(contents, s3_bucket, func_params)
+
+    def if_stack_unchanged(self, stack_name, state_key, digest):
+        """If stack was deployed from the same inputs and is still healthy"""
+        if not self._state.if_unchanged(state_key, digest):
+            return False
+
+        stack_info = self.get_stack(stack_name=stack_name)
+
+        return bool(stack_info) and stack_info['Stacks'][0]['StackStatus'] in ['CREATE_COMPLETE', 'UPDATE_COMPLETE']
+
+    def deploy_stack(self, stack_name, templates, s3_bucket, func_params):
+        """Upload templates then create or update stack from them"""
+        self.lint_templates(stack_name, templates, func_params.get('Parameters', []), s3_bucket)
+        self.prepare(templates=templates, bucket=s3_bucket, stack_name=stack_name)
+
+        to_update = False
+        stack_info = self.get_stack(stack_name=stack_name)
+
+        if stack_info:
+            # You can't do much with UPDATE_ROLLBACK_FAILED state
+            if stack_info['Stacks'][0]['StackStatus'] == 'UPDATE_ROLLBACK_FAILED':
+                Oprint.warn('State {} is in a very bad state, lmdo cannot do anything. Please refer to {} for action you can take'.format(
+                  stack_name,
+                  'https://aws.amazon.com/blogs/devops/continue-rolling-back-an-update-for-aws-cloudformation-stacks-in-the-update_rollback_failed-state/'), 
+                  self.NAME)
+
+                return False
+
+            # You cannot update a stack with status ROLLBACK_COMPLETE during creation
+            if stack_info['Stacks'][0]['StackStatus'] == 'ROLLBACK_COMPLETE':
+                Oprint.warn('Stack {} exited with bad state ROLLBACK_COMPLETE during last attempt to create. Required to be removed first'.format(stack_name), self.NAME)
+                self.delete_stack(stack_name, no_policy=True)
+            else:
+                to_update = True
+
+        if not s3_bucket:
+            # Read master template data into cache
+            with open(templates['master'], 'r') as outfile:
+                template_body = outfile.read()
+
+            func_params['TemplateBody'] = template_body
+        else:
+            path, template_name = os.path.split(templates['master'])
+            func_params['TemplateURL'] = self.get_template_s3_url(template_name, stack_name)
+
+        if to_update:
+            if self._args.get('-c') or self._args.get('--change_set'):
+                self.stack_update_via_change_set(stack_name=stack_name, **func_params)
+            else:
+                self.update_stack(stack_name, **func_params)
+        else:
+            self.create_stack(stack_name, **func_params)
+
+        # Remove temporary template dir
+        shutil.rmtree(templates['tmp_dir'])
+
+        return True
+
     def create_stack(self, stack_name, capabilities=None, **kwargs):
         """Create stack"""
         try:
             capabilities = capabilities or ['CAPABILITY_NAMED_IAM', 'CAPABILITY_IAM']
-            if self._args.get('-he') or self._args.get('--hide-event'):
-                waiter = CloudformationWaiterStackCreate(self._client)
-                response = self._client.create_stack(
-                    StackName=stack_name,
-                    Capabilities=capabilities,
-                    **kwargs
-                )
-                waiter.wait(stack_name)
-            else:
-                response = self._client.create_stack(
-                    StackName=stack_name,
-                    Capabilities=capabilities,
-                    **kwargs
-                )
-                self.stack_events_waiter(stack_name=stack_name)
+            response = self._client.create_stack(
+                StackName=stack_name,
+                Capabilities=capabilities,
+                **kwargs
+            )
+            status = self.wait_for_stack(stack_name=stack_name, stack_id=response.get('StackId'))
 
             self.lock_stack(stack_name=stack_name)
         except Exception as e:
             Oprint.err(e, self.NAME)
             return False
 
-        self.verify_stack(mode='create', stack_id=response.get('StackId'))
+        self.verify_stack(mode='create', stack_id=response.get('StackId'), status=status)
 
         return True
 
@@ -228,21 +437,12 @@ class Cloudformation(AWSBase):
             capabilities = capabilities or ['CAPABILITY_NAMED_IAM', 'CAPABILITY_IAM']
             self.unlock_stack(stack_name=stack_name)
 
-            if self._args.get('-he') or self._args.get('--hide-event'):
-                waiter = CloudformationWaiterStackUpdate(self._client)
-                response = self._client.update_stack(
-                    StackName=stack_name,
-                    Capabilities=capabilities,
-                    **kwargs
-                )
-                waiter.wait(stack_name)
-            else:
-                response = self._client.update_stack(
-                    StackName=stack_name,
-                    Capabilities=capabilities,
-                    **kwargs
-                )
-                self.stack_events_waiter(stack_name=stack_name)
+            response = self._client.update_stack(
+                StackName=stack_name,
+                Capabilities=capabilities,
+                **kwargs
+            )
+            status = self.wait_for_stack(stack_name=stack_name, stack_id=response.get('StackId'))
 
             self.lock_stack(stack_name=stack_name)
         except ClientError as ce:
@@ -255,7 +455,7 @@ class Cloudformation(AWSBase):
             Oprint.err(e, self.NAME)
             return False
 
-        self.verify_stack(mode='update', stack_id=response.get('StackId'))
+        self.verify_stack(mode='update', stack_id=response.get('StackId'), status=status)
 
         return True
 
@@ -270,18 +470,13 @@ class Cloudformation(AWSBase):
             if not no_policy:
                 self.unlock_stack(stack_name=stack_name)
 
-            if self._args.get('-he') or self._args.get('--hide-event'):
-                waiter = CloudformationWaiterStackDelete(self._client)
-                response = self._client.delete_stack(StackName=stack_name)
-                waiter.wait(stack_name)   
-            else:
-                response = self._client.delete_stack(StackName=stack_name)
-                self.stack_events_waiter(stack_name=stack_name)
+            response = self._client.delete_stack(StackName=stack_name)
+            status = self.wait_for_stack(stack_name=stack_name, stack_id=stack_info['Stacks'][0]['StackId'])
         except Exception as e:
             Oprint.err(e, self.NAME)
             return False
 
-        self.verify_stack(mode='delete', stack_id=stack_info['Stacks'][0]['StackId'])
+        self.verify_stack(mode='delete', stack_id=stack_info['Stacks'][0]['StackId'], status=status)
 
         return True
 
@@ -298,9 +493,9 @@ class Cloudformation(AWSBase):
 
         return status
 
-    def verify_stack(self, mode, stack_id=None):
+    def verify_stack(self, mode, stack_id=None, status=None):
         """Check if stack action successful, deleted stack must provide stack id"""
-        status = self.get_stack_status(stack_id=stack_id)
+        status = status or self.get_stack_status(stack_id=stack_id)
 
         if mode == 'create':
             if status != 'CREATE_COMPLETE':
@@ -379,22 +574,15 @@ class Cloudformation(AWSBase):
         try:
             self.unlock_stack(stack_name=stack_name)
 
-            if self._args.get('-he') or self._args.get('--hide-event'):
-                waiter = CloudformationWaiterStackUpdate(self._client)
-                Oprint.info('Executing change set {} for updating stack {}'.format(change_set_name, stack_name), self.NAME)
-                response = self._client.execute_change_set(ChangeSetName=change_set_name, StackName=stack_name, *args, **kwargs)
-                waiter.wait(stack_name)
-            else:
-                Oprint.info('Executing change set {} for updating stack {}'.format(change_set_name, stack_name), self.NAME)
-                response = self._client.execute_change_set(ChangeSetName=change_set_name, StackName=stack_name, *args, **kwargs)
-
-                self.stack_events_waiter(stack_name=stack_name)
+            Oprint.info('Executing change set {} for updating stack {}'.format(change_set_name, stack_name), self.NAME)
+            response = self._client.execute_change_set(ChangeSetName=change_set_name, StackName=stack_name, *args, **kwargs)
+            status = self.wait_for_stack(stack_name=stack_name)
 
             self.lock_stack(stack_name=stack_name)
         except Exception as e:
             Oprint.err(e, self.NAME)
 
-        self.verify_stack(mode='update', stack_id=stack_name)
+        self.verify_stack(mode='update', stack_id=stack_name, status=status)
 
         return response
 
@@ -450,20 +638,13 @@ class Cloudformation(AWSBase):
 
         return True
 
-    def get_stack_event(self, stack_name, *args, **kwargs):
-        try:
-            response = self._client.describe_stack_events(StackName=stack_name, *args, **kwargs)
-        except Exception as e:
-            Oprint.warn(e, self.NAME)
-        return response
+    def if_hide_event(self):
+        return bool(self._args.get('-he') or self._args.get('--hide-event'))
 
-    def display_stack_event(self, stack_name, *args, **kwargs):
+    def display_stack_event(self, stack_name, events):
         """Displaying new stack event"""
-        events = self.get_stack_event(stack_name=stack_name)['StackEvents']
-        events.reverse()
-        new_events = [event for event in events if (not self.current_event_timestamp) or (event["Timestamp"] > self.current_event_timestamp)]
-        for event in new_events:
-            prefix = 'Stack Event | '
+        prefix = 'Stack Event | {} | '.format(stack_name)
+        for event in events:
             event_info = ' '.join([
                 event['Timestamp'].replace(microsecond=0).isoformat(),
                 event['LogicalResourceId'],
@@ -473,24 +654,9 @@ class Cloudformation(AWSBase):
             ])
             Oprint.info('{}{}'.format(prefix, event_info), self.NAME)
 
-            # Update timestamp
-            if not self.current_event_timestamp:
-                self.current_event_timestamp = event['Timestamp']
-            elif event['Timestamp'] > self.current_event_timestamp:
-                self.current_event_timestamp = event['Timestamp']
-
-    def stack_events_waiter(self, stack_name):
-        """Event waiter"""
-        in_progress = True
-        while in_progress:
-            try:
-                in_progress = self.get_stack_status(stack_id=stack_name, status_niddle=CfStatus.STACK_IN_PROGRESS)
-                self.display_stack_event(stack_name=stack_name)
-                time.sleep(3)
-            except Exception:
-                in_progress = False
-
-        return in_progress
+    def wait_for_stack(self, stack_name, stack_id=None):
+        """Wait for stack operation to finish, return final stack status"""
+        return self._watcher.watch(stack_name=stack_name, stack_id=stack_id).wait(stack_name)
 
     def display_change_set(self, change_set_name, stack_name):
         """Display change set infos"""
@@ -0,0 +1,92 @@
+from botocore.exceptions import ClientError
+
+from lmdo.config import CLOUDFORMATION_EVENT_POLL_MIN, CLOUDFORMATION_EVENT_POLL_MAX
+
+
+class StackEventStream(object):
+    """
+    New events of a stack, oldest first. Pages are only read
+    back to the last event seen, stack status is taken from
+    the stack's own events so no describe_stacks is needed
+    """
+    BACKOFF = 1.5
+    THROTTLING_CODES = ['Throttling', 'ThrottlingException']
+
+    def __init__(self, client, stack_name, since=None, min_interval=CLOUDFORMATION_EVENT_POLL_MIN, max_interval=CLOUDFORMATION_EVENT_POLL_MAX):
+        self._client = client
+        self._stack_name = stack_name
+        self._since = since
+        self._last_event_id = None
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._interval = min_interval
+        self._status = None
+
+    @property
+    def stack_name(self):
+        return self._stack_name
+
+    @property
+    def status(self):
+        """Latest stack status seen in events, None if there wasn't any"""
+        return self._status
+
+    @property
+    def interval(self):
+        """Seconds to wait before next poll"""
+        return self._interval
+
+    def restart(self):
+        """Forget stack status before following a new operation"""
+        self._status = None
+        self._interval = self._min_interval
+
+    def if_in_progress(self):
+        return self._status is None or self._status.endswith('_IN_PROGRESS')
+
+    def if_seen(self, event):
+        if self._last_event_id:
+            return event['EventId'] == self._last_event_id
+
+        return bool(self._since) and event['Timestamp'] <= self._since
+
+    def fetch(self):
+        """Events newer than the last seen, newest first as AWS returns them"""
+        events = []
+        kwargs = {'StackName': self._stack_name}
+        while True:
+            response = self._client.describe_stack_events(**kwargs)
+            for event in response['StackEvents']:
+                if self.if_seen(event):
+                    return events
+                events.append(event)
+
+            if not response.get('NextToken'):
+                return events
+            kwargs['NextToken'] = response['NextToken']
+
+    def poll(self):
+        """New events since last poll, the poll interval adapts to them"""
+        try:
+            events = self.fetch()
+        except ClientError as ce:
+            if ce.response['Error']['Code'] not in self.THROTTLING_CODES:
+                raise
+            self._interval = self._max_interval
+            return []
+
+        if not events:
+            self._interval = min(self._max_interval, self._interval * self.BACKOFF)
+            return []
+
+        self._interval = self._min_interval
+        self._last_event_id = events[0]['EventId']
+        for event in events:
+            # Nested stacks have their own logical id
+            if event['ResourceType'] == 'AWS::CloudFormation::Stack' and event['LogicalResourceId'] == event['StackName']:
+                self._status = event['ResourceStatus']
+                break
+
+        events.reverse()
+
+        return events
@@ -0,0 +1,148 @@
+import time
+import threading
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+from lmdo.cmds.cf.stack_event_stream import StackEventStream
+from lmdo.config import CLOUDFORMATION_WATCH_RATE
+from lmdo.oprint import Oprint
+
+
+class StackWatcher(object):
+    """
+    Follow any number of stack operations from one thread.
+    Polls of all stacks share a rate limit, each stack is
+    polled as often as its event stream asks for
+    """
+    NAME = 'cloudformation'
+
+    def __init__(self, client, since=None, show_events=True, display=None, rate=CLOUDFORMATION_WATCH_RATE):
+        self._client = client
+        self._since = since
+        self._show_events = show_events
+        self._display = display
+        self._rate = rate
+        self._streams = {}
+        self._stacks = OrderedDict()
+        self._lock = threading.Condition()
+        self._thread = None
+        self._last_call = 0
+
+    def watch(self, stack_name, stack_id=None):
+        """
+        Start following an operation on a stack. Deleted stacks
+        can only be looked up by stack id
+        """
+        with self._lock:
+            identifier = stack_id or stack_name
+            if identifier not in self._streams:
+                self._streams[identifier] = StackEventStream(self._client, identifier, since=self._since)
+
+            stream = self._streams[identifier]
+            stream.restart()
+            self._stacks[stack_name] = {
+                'stream': stream,
+                'status': None,
+                'started': time.time(),
+                'finished': None,
+                'next_poll': 0,
+                'done': threading.Event(),
+            }
+
+            if not self._thread:
+                self._thread = threading.Thread(target=self.run)
+                self._thread.daemon = True
+                self._thread.start()
+            self._lock.notify()
+
+        return self
+
+    def wait(self, stack_name):
+        """Block until stack operation is done, return final stack status"""
+        stack = self._stacks.get(stack_name)
+        if not stack:
+            return None
+
+        # Timeout keeps python 2 responsive to Ctrl-C
+        while not stack['done'].is_set():
+            stack['done'].wait(365 * 24 * 3600)
+
+        return stack['status']
+
+    def results(self):
+        """Final status of each stack watched, None if it couldn't be told"""
+        return OrderedDict([(name, stack['status']) for name, stack in self._stacks.items() if stack['done'].is_set()])
+
+    def get_active(self):
+        return [(name, stack) for name, stack in self._stacks.items() if not stack['done'].is_set()]
+
+    def run(self):
+        """Poll whichever stack is due next, within the shared rate"""
+        while True:
+            with self._lock:
+                active = self.get_active()
+                if not active:
+                    self._thread = None
+                    return
+
+                stack_name, stack = min(active, key=lambda item: item[1]['next_poll'])
+                delay = max(stack['next_poll'], self._last_call + 1.0 / self._rate) - time.time()
+                if delay > 0:
+                    # Newly watched stacks wake it up earlier
+                    self._lock.wait(delay)
+                    continue
+
+                self._last_call = time.time()
+
+            self.poll(stack_name, stack)
+
+    def poll(self, stack_name, stack):
+        stream = stack['stream']
+        try:
+            events = stream.poll()
+            status = stream.status
+            if not status:
+                # Stack's own event isn't there yet
+                status = self._client.describe_stacks(StackName=stream.stack_name)['Stacks'][0]['StackStatus']
+        except ClientError as ce:
+            if ce.response['Error']['Code'] in StackEventStream.THROTTLING_CODES:
+                stack['next_poll'] = time.time() + stream.interval
+                return False
+            Oprint.warn('Stopped watching stack {}: {}'.format(stack_name, ce.response['Error']['Message']), self.NAME)
+            return self.finish(stack, None)
+        except Exception as e:
+            Oprint.warn('Stopped watching stack {}: {}'.format(stack_name, e), self.NAME)
+            return self.finish(stack, None)
+
+        if self._show_events and events and self._display:
+            self._display(stack_name, events)
+
+        changed = status != stack['status']
+        stack['status'] = status
+        if status.endswith('_IN_PROGRESS'):
+            stack['next_poll'] = time.time() + stream.interval
+        else:
+            self.finish(stack, status)
+
+        if changed and not self._show_events:
+            self.render()
+
+        return True
+
+    def finish(self, stack, status):
+        stack['status'] = status
+        stack['finished'] = time.time()
+        stack['done'].set()
+
+        return True
+
+    def render(self):
+        """Status table of stacks watched so far"""
+        now = time.time()
+        Oprint.info('{:<50} {:<40} {:>8}'.format('Stack', 'Status', 'Elapsed'), self.NAME)
+        for name, stack in self._stacks.items():
+            elapsed = int((stack['finished'] or now) - stack['started'])
+            Oprint.info('{:<50} {:<40} {:>7}s'.format(name, stack['status'] or 'PENDING', elapsed), self.NAME)
+
+        return True
@@ -0,0 +1,304 @@
+import os
+import re
+import json
+import difflib
+
+import yaml
+
+
+class CfnYamlLoader(yaml.SafeLoader):
+    """Yaml loader turning short form intrinsic functions into their long form"""
+    pass
+
+def construct_intrinsic(loader, tag_suffix, node):
+    if isinstance(node, yaml.ScalarNode):
+        value = loader.construct_scalar(node)
+    elif isinstance(node, yaml.SequenceNode):
+        value = loader.construct_sequence(node, deep=True)
+    else:
+        value = loader.construct_mapping(node, deep=True)
+
+    if tag_suffix in ['Ref', 'Condition']:
+        return {tag_suffix: value}
+
+    if tag_suffix == 'GetAtt' and not isinstance(value, list):
+        value = value.split('.', 1)
+
+    return {'Fn::{}'.format(tag_suffix): value}
+
+CfnYamlLoader.add_multi_constructor('!', construct_intrinsic)
+
+
+class TemplateLinter(object):
+    """
+    Offline checks of rendered templates, so obvious mistakes
+    fail before anything is uploaded or a stack is touched
+    """
+    NAME = 'cloudformation'
+    RESOURCE_TYPES_FILE = 'cloudformation_resource_types.json'
+
+    # Limits of CloudFormation
+    MAX_BODY_SIZE = 51200
+    MAX_URL_BODY_SIZE = 1024 * 1024
+    MAX_RESOURCES = 500
+    MAX_PARAMETERS = 200
+    MAX_OUTPUTS = 200
+    MAX_MAPPINGS = 200
+    MAX_DESCRIPTION_SIZE = 1024
+
+    SECTIONS = ['AWSTemplateFormatVersion', 'Description', 'Metadata', 'Parameters', 'Rules', 'Mappings', 'Conditions', 'Transform', 'Resources', 'Outputs']
+    RESOURCE_ATTRIBUTES = ['Type', 'Properties', 'DependsOn', 'Condition', 'Metadata', 'DeletionPolicy', 'UpdatePolicy', 'UpdateReplacePolicy', 'CreationPolicy', 'Version']
+    PSEUDO_PARAMETERS = ['AWS::AccountId', 'AWS::NotificationARNs', 'AWS::NoValue', 'AWS::Partition', 'AWS::Region', 'AWS::StackId', 'AWS::StackName', 'AWS::URLSuffix']
+    LOGICAL_ID_REGX = r'^[A-Za-z0-9]+$'
+    SUB_VAR_REGX = r'\$\{([^!}][^}]*)\}'
+
+    _resource_types = None
+
+    def __init__(self, templates, params=None, via_s3=False):
+        self._templates = templates
+        self._params = params
+        self._via_s3 = via_s3
+        self._errors = []
+        self._warnings = []
+
+    @property
+    def errors(self):
+        return self._errors
+
+    @property
+    def warnings(self):
+        return self._warnings
+
+    @classmethod
+    def get_resource_types(cls):
+        """Resource types known to the bundled spec"""
+        if cls._resource_types is None:
+            lmdo_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            path = os.path.join(lmdo_dir, 'local_template', cls.RESOURCE_TYPES_FILE)
+            with open(path) as f:
+                cls._resource_types = set(json.load(f)['ResourceTypes'])
+
+        return cls._resource_types
+
+    @classmethod
+    def load(cls, body):
+        """Template body as dict, json or yaml"""
+        try:
+            return json.loads(body)
+        except ValueError:
+            return yaml.load(body, Loader=CfnYamlLoader)
+
+    def error(self, template_name, msg):
+        self._errors.append('{}: {}'.format(template_name, msg))
+
+    def warn(self, template_name, msg):
+        self._warnings.append('{}: {}'.format(template_name, msg))
+
+    def lint(self):
+        """Check master and children templates, return True if no error found"""
+        loaded = {}
+        for template in [self._templates['master']] + self._templates['children']:
+            name = os.path.basename(template)
+            with open(template, 'r') as f:
+                body = f.read()
+
+            self.check_size(name, body, template == self._templates['master'])
+            try:
+                loaded[name] = self.load(body)
+            except Exception as e:
+                self.error(name, 'cannot be parsed: {}'.format(e))
+                continue
+
+            # Macros may add sections, resources and parameters
+            if self.check_structure(name, loaded[name]) and not loaded[name].get('Transform'):
+                self.check_resource_types(name, loaded[name])
+                self.check_references(name, loaded[name])
+
+        master = loaded.get(os.path.basename(self._templates['master']))
+        if isinstance(master, dict) and self._params is not None:
+            given = dict([(param['ParameterKey'], param.get('ParameterValue')) for param in self._params])
+            self.check_parameters(os.path.basename(self._templates['master']), master, given, 'params file')
+
+        for name, template in loaded.items():
+            if isinstance(template, dict) and not template.get('Transform'):
+                self.check_nested_stacks(name, template, loaded)
+
+        return not self._errors
+
+    def check_size(self, name, body, is_master):
+        size = len(body.encode('utf-8') if not isinstance(body, bytes) else body)
+        # Only the master template may be sent as body
+        limit = self.MAX_URL_BODY_SIZE if self._via_s3 or not is_master else self.MAX_BODY_SIZE
+        if size > limit:
+            self.error(name, 'template is {} bytes, more than the {} bytes allowed{}'.format(size, limit, '' if limit == self.MAX_URL_BODY_SIZE else ', configure S3Bucket to upload it'))
+
+    def check_structure(self, name, template):
+        """
+        Sections, resources and outputs are well formed,
+        False if the template can't be checked further
+        """
+        if not isinstance(template, dict):
+            self.error(name, 'template must be a mapping')
+            return False
+
+        for section in template:
+            if section not in self.SECTIONS and not template.get('Transform'):
+                self.error(name, 'unknown section {}{}'.format(section, self.get_suggestion(section, self.SECTIONS)))
+
+        resources = template.get('Resources')
+        if not isinstance(resources, dict) or not resources:
+            self.error(name, 'Resources section is required and can\'t be empty')
+            return False
+
+        for section, limit in [('Resources', self.MAX_RESOURCES), ('Parameters', self.MAX_PARAMETERS), ('Outputs', self.MAX_OUTPUTS), ('Mappings', self.MAX_MAPPINGS)]:
+            if len(template.get(section) or {}) > limit:
+                self.error(name, 'more than {} {}'.format(limit, section))
+
+        if len(str(template.get('Description') or '')) > self.MAX_DESCRIPTION_SIZE:
+            self.error(name, 'Description is longer than {} bytes'.format(self.MAX_DESCRIPTION_SIZE))
+
+        for section in ['Parameters', 'Resources', 'Outputs', 'Mappings', 'Conditions']:
+            if section in template and not isinstance(template[section], dict):
+                self.error(name, '{} must be a mapping'.format(section))
+                return False
+
+            for logical_id in template.get(section) or {}:
+                if not re.match(self.LOGICAL_ID_REGX, str(logical_id)):
+                    self.error(name, '{} {} must be alphanumeric'.format(section, logical_id))
+
+        for logical_id, param in (template.get('Parameters') or {}).items():
+            if not isinstance(param, dict) or not param.get('Type'):
+                self.error(name, 'parameter {} has no Type'.format(logical_id))
+
+        for logical_id, resource in resources.items():
+            if not isinstance(resource, dict) or not isinstance(resource.get('Type'), basestring):
+                self.error(name, 'resource {} has no Type'.format(logical_id))
+                continue
+
+            for attribute in resource:
+                if attribute not in self.RESOURCE_ATTRIBUTES:
+                    self.error(name, 'resource {} has unknown attribute {}{}'.format(logical_id, attribute, self.get_suggestion(attribute, self.RESOURCE_ATTRIBUTES)))
+
+        for logical_id, output in (template.get('Outputs') or {}).items():
+            if not isinstance(output, dict) or 'Value' not in output:
+                self.error(name, 'output {} has no Value'.format(logical_id))
+
+        return True
+
+    @classmethod
+    def get_suggestion(cls, value, candidates):
+        matches = difflib.get_close_matches(str(value), candidates, n=1, cutoff=0.8)
+        return ', did you mean {}?'.format(matches[0]) if matches else ''
+
+    def check_resource_types(self, name, template):
+        """Resource types exist, custom and third party types aren't checked"""
+        known = self.get_resource_types()
+        services = set([resource_type.split('::')[1] for resource_type in known])
+        for logical_id, resource in template['Resources'].items():
+            resource_type = resource.get('Type') if isinstance(resource, dict) else None
+            if not isinstance(resource_type, basestring) or not resource_type.startswith('AWS::') or resource_type in known:
+                continue
+
+            suggestion = self.get_suggestion(resource_type, list(known))
+            parts = resource_type.split('::')
+            if suggestion or len(parts) != 3 or parts[1] not in services:
+                self.error(name, 'resource {} has unknown type {}{}'.format(logical_id, resource_type, suggestion))
+            else:
+                # Bundled spec may be behind new resource types
+                self.warn(name, 'resource {} type {} isn\'t in lmdo resource spec'.format(logical_id, resource_type))
+
+    def walk(self, node, path=''):
+        """Yield (path, key, value) of every intrinsic function in node"""
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == 'Ref' or key == 'Condition' or str(key).startswith('Fn::'):
+                    yield path, key, value
+                for found in self.walk(value, '{}/{}'.format(path, key)):
+                    yield found
+        elif isinstance(node, list):
+            for index, value in enumerate(node):
+                for found in self.walk(value, '{}/{}'.format(path, index)):
+                    yield found
+
+    def check_references(self, name, template):
+        """Ref, GetAtt, Sub, DependsOn and conditions point to something defined"""
+        resources = template['Resources']
+        refs = set(list(template.get('Parameters') or {}) + list(resources) + self.PSEUDO_PARAMETERS)
+        conditions = set(template.get('Conditions') or {})
+
+        def check_ref(path, target):
+            if isinstance(target, basestring) and target not in refs:
+                self.error(name, '{} refers to undefined {}{}'.format(path, target, self.get_suggestion(target, list(refs))))
+
+        def check_resource(path, target):
+            if isinstance(target, basestring) and target not in resources:
+                self.error(name, '{} refers to undefined resource {}{}'.format(path, target, self.get_suggestion(target, list(resources))))
+
+        for path, key, value in self.walk(template):
+            if key == 'Ref':
+                check_ref(path, value)
+            elif key == 'Fn::GetAtt':
+                target = value.split('.', 1)[0] if isinstance(value, basestring) else (value[0] if isinstance(value, list) and value else None)
+                check_resource(path, target)
+            elif key == 'Fn::Sub':
+                string, variables = (value[0], value[1] if len(value) > 1 and isinstance(value[1], dict) else {}) if isinstance(value, list) and value else (value, {})
+                if isinstance(string, basestring):
+                    for var in re.findall(self.SUB_VAR_REGX, string):
+                        if var in variables:
+                            continue
+                        if '.' in var:
+                            check_resource(path, var.split('.', 1)[0])
+                        else:
+                            check_ref(path, var)
+            elif key == 'Fn::If' or (key == 'Condition' and path.startswith('/Conditions')):
+                target = value[0] if isinstance(value, list) and value else value
+                if isinstance(target, basestring) and target not in conditions:
+                    self.error(name, '{} refers to undefined condition {}'.format(path, target))
+
+        for logical_id, resource in resources.items():
+            if not isinstance(resource, dict):
+                continue
+
+            depends_on = resource.get('DependsOn') or []
+            for target in depends_on if isinstance(depends_on, list) else [depends_on]:
+                check_resource('/Resources/{}/DependsOn'.format(logical_id), target)
+
+        for section in ['Resources', 'Outputs']:
+            for logical_id, item in (template.get(section) or {}).items():
+                condition = item.get('Condition') if isinstance(item, dict) else None
+                if isinstance(condition, basestring) and condition not in conditions:
+                    self.error(name, '{} {} refers to undefined condition {}'.format(section, logical_id, condition))
+
+    def check_parameters(self, name, template, given, source):
+        """Given parameters match the ones declared"""
+        declared = template.get('Parameters') or {}
+        for key in given:
+            if key not in declared:
+                self.error(name, 'parameter {} in {} isn\'t declared in template{}'.format(key, source, self.get_suggestion(key, list(declared))))
+
+        for key, param in declared.items():
+            if not isinstance(param, dict):
+                continue
+
+            if key not in given and 'Default' not in param:
+                self.error(name, 'parameter {} has no Default and no value in {}'.format(key, source))
+
+            value = given.get(key)
+            if isinstance(value, (basestring, int, float)) and param.get('AllowedValues') and str(value) not in [str(allowed) for allowed in param['AllowedValues']]:
+                self.error(name, 'parameter {} value {} isn\'t one of {}'.format(key, value, ', '.join([str(allowed) for allowed in param['AllowedValues']])))
+
+    def check_nested_stacks(self, name, template, loaded):
+        """Parameters passed to child stacks in this run match what they declare"""
+        for logical_id, resource in template['Resources'].items():
+            if not isinstance(resource, dict) or resource.get('Type') != 'AWS::CloudFormation::Stack':
+                continue
+
+            properties = resource.get('Properties') or {}
+            url = properties.get('TemplateURL')
+            child = url.split('/').pop() if isinstance(url, basestring) else None
+            if not isinstance(loaded.get(child), dict) or child == name:
+                continue
+
+            params = properties.get('Parameters')
+            if isinstance(params, dict):
+                self.check_parameters(child, loaded[child], params, 'stack {} of {}'.format(logical_id, name))
@@ -0,0 +1,70 @@
+import os
+import hashlib
+import tempfile
+
+from lmdo.oprint import Oprint
+from lmdo.config import VALIDATION_CACHE_MAX_ENTRIES
+from lmdo.utils import get_cache_dir
+
+
+class ValidationCache(object):
+    """
+    Templates that passed validate_template, stored by hash
+    of the rendered body so they aren't sent again
+    """
+    NAME = 'cloudformation'
+
+    def __init__(self, scope='', cache_dir=None):
+        self._scope = scope
+        self._cache_dir = cache_dir or get_cache_dir('validation')
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def get_key(self, template_body):
+        # Resource types available differ by region
+        sha = hashlib.sha256('{}\n'.format(self._scope).encode('utf-8'))
+        sha.update(template_body if isinstance(template_body, bytes) else template_body.encode('utf-8'))
+        return sha.hexdigest()
+
+    def get_path(self, template_body):
+        return os.path.join(self._cache_dir, '{}.valid'.format(self.get_key(template_body)))
+
+    def if_valid(self, template_body):
+        """If template passed validation before"""
+        path = self.get_path(template_body)
+        if os.path.isfile(path):
+            # Touch so pruning keeps recently used entries
+            os.utime(path, None)
+            return True
+
+        return False
+
+    def put(self, template_body):
+        """Remember template as valid"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            os.close(fd)
+            os.rename(tmp_path, self.get_path(template_body))
+            self.prune()
+        except (IOError, OSError) as e:
+            Oprint.warn('Cannot cache template validation: {}'.format(e), self.NAME)
+            return False
+
+        return True
+
+    def prune(self, max_entries=VALIDATION_CACHE_MAX_ENTRIES):
+        """Remove least recently used entries"""
+        entries = [os.path.join(self._cache_dir, f) for f in os.listdir(self._cache_dir) if f.endswith('.valid')]
+        if len(entries) <= max_entries:
+            return True
+
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[max_entries:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        return True
@@ -4,10 +4,15 @@ import uuid
 import os
 import copy
 import random
+import json
+
+from botocore.exceptions import ClientError
 
 from lmdo.cmds.aws_base import AWSBase
+from lmdo.convertors.stack_var_convertor import StackVarConvertor
 from lmdo.cmds.iam.iam import IAM
 from lmdo.oprint import Oprint
+from lmdo.deploy_state import DeployState
 
 
 class CloudWatchEvent(AWSBase):
@@ -25,6 +30,7 @@ class CloudWatchEvent(AWSBase):
         self._lambda = self.get_client('lambda')
         self._iam = IAM()
         self._default_role_arn = None
+        self._state = self.get_deploy_state()
 
     @property
     def client(self):
@@ -56,15 +62,22 @@ class CloudWatchEvent(AWSBase):
             Oprint.info('No CloudWatch Events to process', self.NAME)
             return True
 
-        rules= self.get_deployment_data(self._config.get('CloudWatchEvent'))
+        rules= self.get_deployment_data(self.convert_config())
         for rule in rules:
+            state_key = 'rule:{}'.format(rule['Name'])
+            digest = DeployState.get_hash(rule)
+            if self._state.if_unchanged(state_key, digest) and self.if_rule_exist(rule['Name']):
+                Oprint.info('Rule {} is unchanged since last deploy, skip'.format(rule['Name']), self.NAME)
+                continue
+
             targets = rule.pop('Targets')
             self.upsert_rule(**rule)
             self.upsert_targets(rule_name=rule['Name'], targets=targets)
+            self._state.put(state_key, digest)
 
         return True
 
-    def get_deployment_data(self, events, delete=False):
+    def get_deployment_data(self, events, delete=False, dry_run=False):
         rule_list = []
 
         # create the rule list so that we know what rules to create
@@ -92,6 +105,9 @@ class CloudWatchEvent(AWSBase):
 
             if rule.get('RoleArn'):
                 rule_entry['RoleArn'] = rule.get('RoleArn')
+            elif dry_run:
+                # Role the rule would get, without creating it
+                rule_entry['RoleArn'] = self.get_role_arn(self.get_lmdo_format_name('default-events-cwe'))
             else:
                 if not self._default_role_arn:
                     self._default_role_arn = self.create_default_role()
@@ -132,6 +148,13 @@ class CloudWatchEvent(AWSBase):
 
         return rule_list
 
+    def convert_config(self):
+        """Rules with stack output variables replaced"""
+        config = self._config.get('CloudWatchEvent')
+        _, json_data = StackVarConvertor().process((json.dumps(config), config))
+
+        return json_data
+
     def create_default_role(self):
         """Create a default event rule role"""
         return self._iam.create_default_events_role(role_name=self.get_lmdo_format_name('default-events-cwe'))['Role']['Arn'] 
@@ -187,6 +210,48 @@ class CloudWatchEvent(AWSBase):
 
         return True
 
+    def get_plan_items(self):
+        """Resources to compare with what is deployed, for plan"""
+        if not self._config.get('CloudWatchEvent'):
+            return []
+
+        rules = self.get_deployment_data(self.convert_config(), dry_run=True)
+
+        return [('rule', rule['Name'], lambda rule=rule: self.plan_rule(rule)) for rule in rules]
+
+    def plan_rule(self, rule):
+        """Compare rule definition and target ARNs with deployed rule"""
+        try:
+            live = self._client.describe_rule(Name=rule['Name'])
+        except ClientError as ce:
+            if ce.response['Error']['Code'] == 'ResourceNotFoundException':
+                return 'create', []
+            raise
+
+        changes = [key for key in ['ScheduleExpression', 'State', 'Description', 'RoleArn'] if rule.get(key) != live.get(key)]
+
+        patterns = [json.loads(pattern) if pattern else None for pattern in [rule.get('EventPattern'), live.get('EventPattern')]]
+        if patterns[0] != patterns[1]:
+            changes.append('EventPattern')
+
+        arns = []
+        for response in self._client.get_paginator('list_targets_by_rule').paginate(Rule=rule['Name']):
+            arns += [target['Arn'] for target in response.get('Targets')]
+
+        if sorted(arns) != sorted([target['Arn'] for target in rule.get('Targets') or []]):
+            changes.append('Targets')
+
+        return ('update' if changes else 'unchanged'), changes
+
+    def if_rule_exist(self, name):
+        """Check if rule exists"""
+        try:
+            self._client.describe_rule(Name=name)
+        except Exception:
+            return False
+
+        return True
+
     def delete_rule(self, name):
         """Delete a cloudwatch event rule"""
         try:
@@ -0,0 +1,47 @@
+import json
+
+from lmdo.cmds.lm.aws_lambda import AWSLambda
+from lmdo.cmds.cwe.cloudwatch_event import CloudWatchEvent
+
+COMPONENT_CLOUDFORMATION = 'cloudformation'
+COMPONENT_LAMBDA = 'lambda'
+COMPONENT_APIGATEWAY = 'apigateway'
+COMPONENT_CLOUDWATCHEVENT = 'cloudwatchevent'
+
+STACK_VAR = '$stack|'
+LOCAL_LAMBDA_VARS = ['$lmdo-lambda-arn|', '$lmdo-lambda-role|']
+
+
+def if_references(value, tags):
+    """If any of the variable tags is used in config value"""
+    content = json.dumps(value)
+    return bool([tag for tag in tags if tag in content])
+
+def get_component_dependencies(config):
+    """
+    Components each component needs deployed first: all stacks
+    unless DeployStacksFirst is false, then only stacks whose
+    outputs it reads, and lmdo functions it points at
+    """
+    dependencies = dict([(name, []) for name in [COMPONENT_CLOUDFORMATION, COMPONENT_LAMBDA, COMPONENT_APIGATEWAY, COMPONENT_CLOUDWATCHEVENT]])
+    stacks_first = config.get('DeployStacksFirst') is not False
+
+    functions = config.get('Lambda') or []
+    if stacks_first or if_references(functions, [STACK_VAR]):
+        dependencies[COMPONENT_LAMBDA].append(COMPONENT_CLOUDFORMATION)
+
+    # API Gateway resolves stack variables of the whole config
+    if stacks_first or if_references(config.config, [STACK_VAR]):
+        dependencies[COMPONENT_APIGATEWAY].append(COMPONENT_CLOUDFORMATION)
+
+    if [lm for lm in functions if lm.get('Type') == AWSLambda.FUNCTION_TYPE_WSGI] or if_references(config.config, LOCAL_LAMBDA_VARS):
+        dependencies[COMPONENT_APIGATEWAY].append(COMPONENT_LAMBDA)
+
+    rules = config.get('CloudWatchEvent') or []
+    if stacks_first or if_references(rules, [STACK_VAR]):
+        dependencies[COMPONENT_CLOUDWATCHEVENT].append(COMPONENT_CLOUDFORMATION)
+
+    if [target for rule in rules for target in rule.get('Targets') or [] if target.get('Type') == CloudWatchEvent.TARGET_LOCAL]:
+        dependencies[COMPONENT_CLOUDWATCHEVENT].append(COMPONENT_LAMBDA)
+
+    return dependencies
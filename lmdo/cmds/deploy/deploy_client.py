@@ -3,26 +3,55 @@ from lmdo.cmds.cf.cloudformation import Cloudformation
 from lmdo.cmds.lm.aws_lambda import AWSLambda
 from lmdo.cmds.api.apigateway import Apigateway
 from lmdo.cmds.cwe.cloudwatch_event import CloudWatchEvent
+from lmdo.cmds.s3.s3 import S3
 from lmdo.cmds.commands import Dispatcher, CreateCommand
 from lmdo.cmds.client_factory import ClientFactory
+from lmdo.cmds.scheduler import Scheduler
+from lmdo.cmds.deploy.dependencies import get_component_dependencies, COMPONENT_CLOUDFORMATION, COMPONENT_LAMBDA, COMPONENT_APIGATEWAY, COMPONENT_CLOUDWATCHEVENT
 from lmdo.oprint import Oprint
 
 class DeployClient(ClientFactory):
     """Cloudformation command client"""
+    # Building lambda packages doesn't need anything deployed
+    TASK_LAMBDA_PACKAGE = 'lambda-package'
+
     def __init__(self, args):
         self._cloudformation = Cloudformation()
         self._lambda = AWSLambda()
-        self._apigateway = Apigateway()
-        self._cloudwatchevent = CloudWatchEvent()
         self._dispatcher = Dispatcher()
         self._args = args
 
+    def get_scheduler(self):
+        """Components as tasks depending on what they use from each other"""
+        dependencies = get_component_dependencies(self._lambda.config)
+
+        # Api gateway resolves variables when created,
+        # so create it once what it needs is deployed
+        commands = {
+            COMPONENT_CLOUDFORMATION: lambda: self._dispatcher.run(CreateCommand(self._cloudformation)),
+            COMPONENT_LAMBDA: lambda: self._dispatcher.run(CreateCommand(self._lambda)),
+            COMPONENT_APIGATEWAY: lambda: self._dispatcher.run(CreateCommand(Apigateway())),
+            COMPONENT_CLOUDWATCHEVENT: lambda: self._dispatcher.run(CreateCommand(CloudWatchEvent())),
+        }
+
+        # Packaging runs alongside stacks, only deploying
+        # functions waits for them
+        scheduler = Scheduler()
+        scheduler.add(self.TASK_LAMBDA_PACKAGE, self._lambda.prepare)
+        for name in [COMPONENT_CLOUDFORMATION, COMPONENT_LAMBDA, COMPONENT_APIGATEWAY, COMPONENT_CLOUDWATCHEVENT]:
+            requires = dependencies[name]
+            if name == COMPONENT_LAMBDA:
+                requires = requires + [self.TASK_LAMBDA_PACKAGE]
+            scheduler.add(name, commands[name], requires)
+
+        return scheduler
+
     def execute(self):
         Oprint.info('Start deploying service', 'lmdo')
-        self._dispatcher.run(CreateCommand(self._cloudformation))
-        self._dispatcher.run(CreateCommand(self._lambda))
-        self._dispatcher.run(CreateCommand(self._apigateway))
-        self._dispatcher.run(CreateCommand(self._cloudwatchevent))
+        try:
+            self.get_scheduler().run()
+        finally:
+            self._lambda.clean_build_stages()
+        S3.stats.report()
         Oprint.info('Complete deploying service', 'lmdo')
 
-
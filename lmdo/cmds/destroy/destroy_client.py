@@ -5,6 +5,8 @@ from lmdo.cmds.api.apigateway import Apigateway
 from lmdo.cmds.cwe.cloudwatch_event import CloudWatchEvent
 from lmdo.cmds.commands import Dispatcher, DeleteCommand
 from lmdo.cmds.client_factory import ClientFactory
+from lmdo.cmds.scheduler import Scheduler
+from lmdo.cmds.deploy.dependencies import get_component_dependencies, COMPONENT_CLOUDFORMATION, COMPONENT_LAMBDA, COMPONENT_APIGATEWAY, COMPONENT_CLOUDWATCHEVENT
 from lmdo.oprint import Oprint
 
 class DestroyClient(ClientFactory):
@@ -17,12 +19,24 @@ class DestroyClient(ClientFactory):
         self._dispatcher = Dispatcher()
         self._args = args
 
+    def get_scheduler(self):
+        """Deploy order turned around, users are removed before what they use"""
+        dependencies = get_component_dependencies(self._lambda.config)
+        components = {
+            COMPONENT_CLOUDFORMATION: self._cloudformation,
+            COMPONENT_LAMBDA: self._lambda,
+            COMPONENT_APIGATEWAY: self._apigateway,
+            COMPONENT_CLOUDWATCHEVENT: self._cloudwatchevent,
+        }
+
+        scheduler = Scheduler()
+        for name in [COMPONENT_APIGATEWAY, COMPONENT_LAMBDA, COMPONENT_CLOUDFORMATION, COMPONENT_CLOUDWATCHEVENT]:
+            scheduler.add(name, lambda component=components[name]: self._dispatcher.run(DeleteCommand(component)), dependencies[name])
+
+        return scheduler.reverse()
+
     def execute(self):
         Oprint.info('Start tear down service', 'lmdo')
-        self._dispatcher.run(DeleteCommand(self._apigateway))
-        self._dispatcher.run(DeleteCommand(self._lambda))
-        self._dispatcher.run(DeleteCommand(self._cloudformation))
-        self._dispatcher.run(DeleteCommand(self._cloudwatchevent))
+        self.get_scheduler().run()
         Oprint.info('Service has been destroy', 'lmdo')
 
-
@@ -1,7 +1,6 @@
 from __future__ import print_function
 import os
 import pip
-import tarfile
 import shutil
 import tempfile
 import subprocess
@@ -10,18 +9,32 @@ import copy
 import random
 import uuid
 import json
+import zipfile
+import calendar
+import threading
+from distutils.spawn import find_executable
+
+from botocore.exceptions import ClientError
 
 from lambda_packages import lambda_packages
 
+from lmdo import __version__
 from lmdo.cmds.aws_base import AWSBase
 from lmdo.cmds.s3.s3 import S3
 from lmdo.cmds.s3.bucket_notification import BucketNotification
 from lmdo.cmds.sns.sns import SNS
 from lmdo.cmds.iam.iam import IAM
 from lmdo.cmds.cwe.cloudwatch_event import CloudWatchEvent
+from lmdo.cmds.lm.build_cache import BuildCache
+from lmdo.cmds.lm.wheelhouse import Wheelhouse
+from lmdo.cmds.lm.lambda_package_cache import LambdaPackageCache
+from lmdo.cmds.lm.package_analyzer import PackageAnalyzer
+from lmdo.cmds.lm.manylinux_wheels import ManylinuxWheels
 from lmdo.oprint import Oprint
-from lmdo.config import LAMBDA_MEMORY_SIZE, LAMBDA_RUNTIME, LAMBDA_TIMEOUT, LAMBDA_EXCLUDE, PIP_VENDOR_FOLDER, PIP_REQUIREMENTS_FILE
-from lmdo.utils import zipper, get_sitepackage_dirs, class_function_retry, copytree
+from lmdo.path_filter import PathFilter
+from lmdo.deploy_state import DeployState
+from lmdo.config import LAMBDA_MEMORY_SIZE, LAMBDA_RUNTIME, LAMBDA_TIMEOUT, LAMBDA_INLINE_UPLOAD_MAX_SIZE, LAMBDA_EXCLUDE, LAMBDA_SLIM_EXCLUDE, PIP_VENDOR_FOLDER, PIP_REQUIREMENTS_FILE
+from lmdo.utils import zip_sources, ZIP_DATE_TIME, get_file_sha256, get_sitepackage_dirs, class_function_retry, copytree, parallel_map, get_jobs
 from lmdo.spinner import spinner
 from lmdo.convertors.stack_var_convertor import StackVarConvertor
 
@@ -57,6 +70,13 @@ class AWSLambda(AWSBase):
         "s3transfer", "six.py", "jmespath", "concurrent"
     ]
 
+    BUILD_STAGE_PROJECT = 'project'
+    BUILD_STAGE_DEPENDENCIES = 'dependencies'
+    BUILD_STAGE_WSGI = 'wsgi'
+
+    # Run under the target runtime interpreter
+    PRECOMPILE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'precompile.py')
+
     EVENT_SOURCE_TYPE_S3 = 's3'
     EVENT_SOURCE_TYPE_SNS = 'sns'
 
@@ -71,6 +91,19 @@ class AWSLambda(AWSBase):
         self._events_dispatcher_arn = {}
         self._heater_arn = None
         self._default_event_role_arn = None
+        self._build_cache = BuildCache()
+        self._build_stages = {}
+        self._build_stage_dirs = []
+        self._lambda_package_cache = LambdaPackageCache()
+        self._dependency_layer_package = None
+        self._dependency_layer_arn = None
+        self._virtualenv_versions = None
+        self._state = self.get_deploy_state()
+        # Guard shared resources when deploying in parallel
+        self._heater_lock = threading.Lock()
+        self._event_role_lock = threading.Lock()
+        self._dependency_layer_lock = threading.Lock()
+        self._virtualenv_lock = threading.Lock()
 
     @property
     def client(self):
@@ -90,6 +123,18 @@ class AWSLambda(AWSBase):
     def package(self):
         self.process()
 
+    def prepare(self):
+        """
+        Build stages shared by function packages ahead of deploy,
+        stack variables aren't needed so it can run before stacks
+        """
+        if not self._config.get('Lambda'):
+            return True
+
+        function_configs = [self.update_function_config(copy.deepcopy(lm)) for lm in self._config.get('Lambda') if self.if_function_selected(lm)]
+
+        return self.prepare_build_stages(function_configs)
+
     def delete(self):
         """Delete lambda functions"""
         # Dont run if doesn't exist
@@ -231,13 +276,12 @@ class AWSLambda(AWSBase):
 
         return response
 
-    def update_function_code(self, func_name, bucket_name, s3_key):
-        """Update lambda code"""
+    def update_function_code(self, func_name, **code):
+        """Update lambda code from S3Bucket/S3Key or ZipFile"""
         try:
             response = self._client.update_function_code(
                 FunctionName=func_name,
-                S3Bucket=bucket_name,
-                S3Key=s3_key
+                **code
             )
             Oprint.info('Lambda function {} codes has been updated'.format(func_name), 'lambda')
         except Exception as e:
@@ -255,77 +299,318 @@ class AWSLambda(AWSBase):
 
         return False
     
-    def add_init_file_to_root(self, tmp_path):
-        """Make sure we have a __init__.py"""
-        init_file = os.path.join(tmp_path, '__init__.py')
-        if not os.path.isfile(init_file):
-            open(init_file, 'a').close()
+    def if_build_cache_enabled(self):
+        """If packages can be reused from local build cache"""
+        return not self._args.get('--no-cache') and self._config.get('BuildCache') is not False
+
+    def if_inline_upload_enabled(self, zip_package):
+        """Small packages are sent straight to Lambda instead of through S3"""
+        return self._config.get('InlineUpload') is not False and os.path.getsize(zip_package) <= LAMBDA_INLINE_UPLOAD_MAX_SIZE
+
+    def if_bucket_needed(self, function_config, zip_package):
+        """If deploying function uploads anything to its S3 bucket"""
+        if self.if_dependency_layer_enabled(function_config):
+            return True
+
+        return bool(zip_package) and not self.if_inline_upload_enabled(zip_package)
+
+    def if_dependency_layer_enabled(self, function_config):
+        """If function dependencies are deployed as a separate layer"""
+        return bool(self._config.get('DependencyLayer')) and function_config.get('Type') not in [self.FUNCTION_TYPE_HEATER, self.FUNCTION_TYPE_GO]
+
+    def get_build_cache_key(self, function_config):
+        """
+        Hash everything going into the package: project tree,
+        requirements, function type and lmdo handler sources
+        """
+        func_type = function_config.get('Type')
+        requirements_file = os.getenv('PIP_REQUIREMENTS_FILE', PIP_REQUIREMENTS_FILE)
+
+        values = [__version__, func_type, requirements_file, self._config.get('VirtualEnv'), self.if_dependency_layer_enabled(function_config), self.if_slim_enabled()]
+        if self.if_precompile_enabled():
+            values += self.get_function_runtimes(function_config)
+        trees = []
+        files = []
+
+        if func_type == self.FUNCTION_TYPE_GO:
+            files.append(os.path.join(os.getcwd(), function_config.get('ExecutableName')))
+        elif func_type != self.FUNCTION_TYPE_HEATER:
+            trees.append(os.getcwd())
+            files.append(os.path.join(os.getcwd(), requirements_file))
+
+            # Virtualenv packages live outside of the project
+            if self._config.get('VirtualEnv'):
+                values += sorted(['{}=={}'.format(name, version) for name, version in self.get_virtualenv_installed_versions().items()])
+
+        if func_type != self.FUNCTION_TYPE_DEFAULT:
+            trees.append(self.get_lmdo_function_dir(func_type))
+
+        return self._build_cache.get_key(trees=trees, files=files, values=values)
 
     def get_zipped_package(self, function_config):
         """Packaging lambda"""
         func_name = function_config.get('FunctionName')
         func_type = function_config.get('Type')
 
-        # Create packaging temp dir
-        lambda_temp_dir = tempfile.mkdtemp()
+        # Go only need executables
+        if func_type == self.FUNCTION_TYPE_GO and not function_config.get('ExecutableName'):
+            Oprint.err('ExecutableName is not defined in lmdo config, function {} won\'t be deployed'.format(func_name), self.NAME)
+
         # Create zip file temp dir
         target_temp_dir = tempfile.mkdtemp()
         target = '{}/{}'.format(target_temp_dir, self.get_zip_name(func_name))
 
-        self.add_init_file_to_root(lambda_temp_dir)
- 
-        if func_type == self.FUNCTION_TYPE_WSGI:
-            self.pip_wsgi_install(lambda_temp_dir)
-      
-        # Heater is one file only from lmdo. don't need packages
-        if func_type != self.FUNCTION_TYPE_HEATER:
-            # Go only need executables
-            if func_type == self.FUNCTION_TYPE_GO:
-                if not function_config.get('ExecutableName'):
-                    Oprint.err('ExecutableName is not defined in lmdo config, function {} won\'t be deployed'.format(func_name), self.NAME)
-                    return False, False
-                
-                # We only have on executable needed 
-                shutil.copy(os.path.join(os.getcwd(), function_config.get('ExecutableName')), lambda_temp_dir)
-            else: 
-                # Copy project files
-                copytree(os.getcwd(), lambda_temp_dir, ignore=shutil.ignore_patterns('*.git*'))
-
-            # Installing package
-            self.dependency_packaging(lambda_temp_dir)
-            
-            replace_path = [
-                {
-                   'from_path': lambda_temp_dir,
-                   'to_path': '.'
-                }
-            ]
+        cache_key = None
+        if self.if_build_cache_enabled():
+            cache_key = self.get_build_cache_key(function_config)
+            cached_package = self._build_cache.get(cache_key)
+            if cached_package:
+                Oprint.info('No changes found for function {}, reusing cached package'.format(func_name), self.NAME)
+                shutil.copyfile(cached_package, target)
+                return (target_temp_dir, target)
 
-            # Zip what we've got so far
-            zipper(lambda_temp_dir, target, LAMBDA_EXCLUDE, False, replace_path)
+        sources = []
+
+        # Go only need executables
+        if func_type == self.FUNCTION_TYPE_GO:
+            sources.append({'from_path': os.path.join(os.getcwd(), function_config.get('ExecutableName')), 'to_path': '.'})
+            sources.append(self.get_init_source())
+
+        for stage in self.get_package_stages(function_config):
+            sources += self.get_build_stage(stage)
 
-       
         # Default type function doesn't need lmdo's lambda wrappers
         if func_type != self.FUNCTION_TYPE_DEFAULT:
+            exclude = copy.deepcopy(LAMBDA_EXCLUDE)
             # Don't load lmdo __init__.py
-            if LAMBDA_EXCLUDE.get('LAMBDA_EXCLUDE'):
-                LAMBDA_EXCLUDE['file_with_path'].append('*{}/{}/__init__.py'.format(self.LMDO_HANDLER_DIR, func_type))
-            else:
-                LAMBDA_EXCLUDE['file_with_path'] = ['*{}/{}/__init__.py'.format(self.LMDO_HANDLER_DIR, func_type)]
+            exclude.setdefault('file_with_path', []).append('*{}/{}/__init__.py'.format(self.LMDO_HANDLER_DIR, func_type))
 
-            replace_path = [
-                {
-                   'from_path': self.get_lmdo_function_dir(func_type),
-                   'to_path': '.'
-                }
-            ]
-            
             # Zip extra lmdo function handler
-            zipper(self.get_lmdo_function_dir(func_type), target, LAMBDA_EXCLUDE, False, replace_path)
+            sources.append({
+                'from_path': self.get_lmdo_function_dir(func_type),
+                'to_path': '.',
+                'exclude': exclude
+            })
+
+        # Files are streamed from their sources in order,
+        # content added by an earlier source takes precedence
+        zip_sources(sources, target, LAMBDA_EXCLUDE)
+
+        if self.if_precompile_enabled():
+            self.precompile_package(target, self.get_function_runtimes(function_config), '/var/task')
+
+        if cache_key:
+            self._build_cache.put(cache_key, target)
 
-        shutil.rmtree(lambda_temp_dir)
         return (target_temp_dir, target)
 
+    def get_package_stages(self, function_config):
+        """Shared build stages a function package is layered from"""
+        func_type = function_config.get('Type')
+
+        # Heater is one file only from lmdo and Go
+        # only needs its executable. don't need packages
+        if func_type in [self.FUNCTION_TYPE_HEATER, self.FUNCTION_TYPE_GO]:
+            return []
+
+        stages = [self.BUILD_STAGE_PROJECT, self.BUILD_STAGE_DEPENDENCIES]
+
+        if func_type == self.FUNCTION_TYPE_WSGI:
+            stages.append(self.BUILD_STAGE_WSGI)
+
+        # Dependencies are shipped in their own layer
+        if self.if_dependency_layer_enabled(function_config):
+            stages.remove(self.BUILD_STAGE_DEPENDENCIES)
+
+        return stages
+
+    def get_dependency_layer_name(self):
+        return self.get_lmdo_format_name('dependencies')
+
+    def get_dependency_layer_key(self):
+        """Hash of everything going into the dependency layer"""
+        requirements_file = os.getenv('PIP_REQUIREMENTS_FILE', PIP_REQUIREMENTS_FILE)
+        values = [__version__, 'dependency-layer', requirements_file, self._config.get('VirtualEnv'), self.if_slim_enabled()]
+        if self.if_precompile_enabled():
+            values += self.get_layer_runtimes()
+        if self._config.get('VirtualEnv'):
+            values += sorted(['{}=={}'.format(name, version) for name, version in self.get_virtualenv_installed_versions().items()])
+
+        return self._build_cache.get_key(files=[os.path.join(os.getcwd(), requirements_file)], values=values)
+
+    def get_dependency_layer_package(self):
+        """
+        Zip dependencies as a layer once per run, returns
+        layer hash and package path
+        """
+        if not self._dependency_layer_package:
+            key = self.get_dependency_layer_key()
+
+            target_temp_dir = tempfile.mkdtemp()
+            self._build_stage_dirs.append(target_temp_dir)
+            target = os.path.join(target_temp_dir, '{}-dependencies-{}.zip'.format(self.get_name_id(), key[:12]))
+
+            cached_package = self._build_cache.get(key) if self.if_build_cache_enabled() else None
+            if cached_package:
+                Oprint.info('No changes found for dependencies, reusing cached layer package', self.NAME)
+                shutil.copyfile(cached_package, target)
+            else:
+                # Python runtimes load layers from python/
+                sources = [dict(source, to_path=os.path.join('python', source['to_path'])) \
+                    for source in self.get_build_stage(self.BUILD_STAGE_DEPENDENCIES)]
+                zip_sources(sources, target, LAMBDA_EXCLUDE)
+                if self.if_precompile_enabled():
+                    self.precompile_package(target, self.get_layer_runtimes(), '/opt')
+
+                if self.if_build_cache_enabled():
+                    self._build_cache.put(key, target)
+
+            Oprint.info('Generated dependency layer package {}'.format(target), self.NAME)
+            if self._args.get('--analyze'):
+                PackageAnalyzer(target, prefix='python/').report()
+            self._dependency_layer_package = (key, target)
+
+        return self._dependency_layer_package
+
+    def get_dependency_layer_arn(self, s3_bucket):
+        """
+        Find layer version built from the same dependencies,
+        build and publish a new version if there isn't one
+        """
+        with self._dependency_layer_lock:
+            if not self._dependency_layer_arn:
+                key = self.get_dependency_layer_key()
+                layer_name = self.get_dependency_layer_name()
+                description = 'Dependencies deployed for service {} by lmdo, hash {}'.format(self._config.get('Service'), key)
+
+                try:
+                    for page in self._client.get_paginator('list_layer_versions').paginate(LayerName=layer_name):
+                        for version in page.get('LayerVersions', []):
+                            if version.get('Description') == description:
+                                Oprint.info('Dependencies unchanged, using layer {}'.format(version.get('LayerVersionArn')), self.NAME)
+                                self._dependency_layer_arn = version.get('LayerVersionArn')
+                                return self._dependency_layer_arn
+
+                    key, layer_package = self.get_dependency_layer_package()
+                    s3_key = os.path.basename(layer_package)
+                    self._s3.upload_file(s3_bucket, layer_package, s3_key)
+                    response = self._client.publish_layer_version(
+                        LayerName=layer_name,
+                        Description=description,
+                        Content={
+                            'S3Bucket': s3_bucket,
+                            'S3Key': s3_key
+                        },
+                        CompatibleRuntimes=self.get_layer_runtimes()
+                    )
+                    Oprint.info('Published dependency layer {}'.format(response.get('LayerVersionArn')), self.NAME)
+                    self._dependency_layer_arn = response.get('LayerVersionArn')
+                except Exception as e:
+                    Oprint.err(e, self.NAME)
+
+        return self._dependency_layer_arn
+
+    def get_build_stage(self, stage):
+        """
+        Prepare content shared by functions once per run,
+        returns the sources each function package is streamed from
+        """
+        if stage not in self._build_stages:
+            if stage == self.BUILD_STAGE_PROJECT:
+                # Project files are read in place
+                sources = [
+                    {
+                        'from_path': os.getcwd(),
+                        'to_path': '.',
+                        'ignore': ['*.git*'] + PathFilter.read_ignore_file(os.getcwd())
+                    },
+                    self.get_init_source()
+                ]
+            else:
+                # Installed packages need somewhere to land
+                stage_dir = tempfile.mkdtemp()
+                self._build_stage_dirs.append(stage_dir)
+
+                if stage == self.BUILD_STAGE_DEPENDENCIES:
+                    sources = self.dependency_packaging(stage_dir)
+                elif stage == self.BUILD_STAGE_WSGI:
+                    self.pip_wsgi_install(stage_dir)
+                    sources = [{'from_path': stage_dir, 'to_path': '.'}]
+
+                if self.if_slim_enabled():
+                    for source in sources:
+                        source['exclude'] = self.get_slim_exclude()
+
+            self._build_stages[stage] = sources
+
+        return self._build_stages[stage]
+
+    def if_slim_enabled(self):
+        """If installed dependencies are slimmed down before packaging"""
+        return bool(self._config.get('SlimPackages'))
+
+    def get_slim_exclude(self):
+        """LAMBDA_EXCLUDE extended with LAMBDA_SLIM_EXCLUDE"""
+        exclude = copy.deepcopy(LAMBDA_EXCLUDE)
+        for kind, patterns in LAMBDA_SLIM_EXCLUDE.items():
+            exclude[kind] = exclude.get(kind, []) + patterns
+
+        return exclude
+
+    def if_precompile_enabled(self):
+        """If packages ship byte-compiled sources"""
+        return bool(self._config.get('Precompile'))
+
+    def get_function_runtimes(self, function_config):
+        return [function_config.get('Runtime') or LAMBDA_RUNTIME]
+
+    def get_layer_runtimes(self):
+        """Runtimes of all functions using the dependency layer"""
+        return sorted(set([lm.get('Runtime') or LAMBDA_RUNTIME for lm in self._config.get('Lambda') or [] if self.if_dependency_layer_enabled(lm)]))
+
+    def precompile_package(self, package_path, runtimes, runtime_dir):
+        """
+        Add byte-compiled python sources to package for each
+        runtime, so cold containers don't compile on import.
+        runtime_dir is where the package is extracted in Lambda
+        """
+        tmp_path = tempfile.mkdtemp()
+        try:
+            with zipfile.ZipFile(package_path) as package:
+                for name in package.namelist():
+                    if name.endswith('.py'):
+                        package.extract(name, tmp_path)
+
+            for runtime in runtimes:
+                interpreter = find_executable(runtime) if runtime.startswith('python') else None
+                if not interpreter:
+                    Oprint.warn('Cannot find {} interpreter, skip precompiling for it'.format(runtime), self.NAME)
+                    continue
+
+                Oprint.info('Precompiling {} for {}'.format(os.path.basename(package_path), runtime), self.NAME)
+                if subprocess.call([interpreter, self.PRECOMPILE_SCRIPT, tmp_path, runtime_dir, str(calendar.timegm(ZIP_DATE_TIME))]) != 0:
+                    Oprint.warn('Precompiling for {} failed'.format(runtime), self.NAME)
+
+            # *.pyc is in LAMBDA_EXCLUDE, don't apply it here
+            zip_sources([{'from_path': tmp_path, 'to_path': '.', 'ignore': ['*.py'], 'exclude': {}}], package_path, delete_exist=False)
+        finally:
+            shutil.rmtree(tmp_path)
+
+        return True
+
+    def get_init_source(self):
+        """Empty __init__.py at package root, used if none is provided"""
+        return {'to_path': '__init__.py', 'content': ''}
+
+    def clean_build_stages(self):
+        """Remove shared build stages"""
+        for stage_dir in self._build_stage_dirs:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+
+        self._build_stages = {}
+        self._build_stage_dirs = []
+        self._dependency_layer_package = None
+
     def get_lmdo_function_dir(self, func_type):
         """Get different function directory"""
         pkg_dir = get_sitepackage_dirs()
@@ -364,20 +649,92 @@ class AWSLambda(AWSBase):
             return True
 
         # Create all functions
-        for lm in config_data:
-            self.function_update_or_create(lm, package_only)
+        try:
+            jobs = get_jobs(self._args)
+            if jobs > 1:
+                self.process_parallel(config_data, jobs)
+            else:
+                for lm in config_data:
+                    self.function_update_or_create(lm, package_only)
+        finally:
+            self.clean_build_stages()
+
+        return True
+
+    def process_parallel(self, config_data, jobs):
+        """
+        Package functions in separate processes, then
+        upload and create/update them concurrently
+        """
+        global _packager
+
+        function_configs = [self.update_function_config(lm) for lm in config_data if self.if_function_selected(lm)]
+
+        # Shared stages are built before forking
+        # so workers only need to layer packages
+        self.prepare_build_stages(function_configs)
+
+        Oprint.info('Packaging {} functions with {} workers'.format(len(function_configs), jobs), self.NAME)
+        _packager = self
+        # Forking isn't safe once other threads run, as
+        # under lmdo deploy, use threads there instead
+        processes = threading.current_thread().name == 'MainThread'
+        packages = parallel_map(_package_function, function_configs, jobs, processes=processes)
+
+        # Some helpers exit 0 on error, workers return None for them
+        failed = [lm.get('FunctionName') for lm, package in zip(function_configs, packages) if not package]
+        if failed:
+            Oprint.err('Packaging failed for functions {}'.format(', '.join(failed)), self.NAME)
+
+        # Make sure buckets exist before uploading in parallel,
+        # packages sent inline don't need one
+        if not self._args.get('package'):
+            for bucket in set([lm.get('S3Bucket') for lm, package in zip(function_configs, packages) if self.if_bucket_needed(lm, package[1])]):
+                self._s3.ensure_bucket(bucket)
+
+        def deploy(item):
+            function_config, package = item
+            tmp_path, zip_package = package
+            return self.deploy_function(function_config, tmp_path, zip_package)
+
+        parallel_map(deploy, zip(function_configs, packages), jobs)
+
+        return True
+
+    def prepare_build_stages(self, function_configs):
+        """Build all shared stages needed by functions not in build cache"""
+        for function_config in function_configs:
+            if self.if_build_cache_enabled() and self._build_cache.get(self.get_build_cache_key(function_config)):
+                continue
+
+            for stage in self.get_package_stages(function_config):
+                self.get_build_stage(stage)
+
+        # Deploy only builds the layer if no published version matches
+        if self._args.get('package') and [lm for lm in function_configs if self.if_dependency_layer_enabled(lm)]:
+            self.get_dependency_layer_package()
 
         return True
 
+    def if_function_selected(self, function_config):
+        """If function is to be processed by the command"""
+        specify_function = self.if_specify_function()
+        return not specify_function or specify_function == function_config.get('FunctionName')
+
     def function_update_or_create(self, function_config, package_only=False, ignore_cmd=False):
         """Create/update function based on config"""
         # If user specify a function
-        specify_function = self.if_specify_function()
-        if not ignore_cmd and specify_function and specify_function != function_config.get('FunctionName'):
+        if not ignore_cmd and not self.if_function_selected(function_config):
             return True
  
         function_config = self.update_function_config(function_config)
-        
+
+        tmp_path, zip_package = self.get_zipped_package(function_config)
+
+        return self.deploy_function(function_config, tmp_path, zip_package)
+
+    def get_function_params(self, function_config):
+        """Lambda API parameters from function config"""
         params = {
             'FunctionName': self.get_lmdo_format_name(function_config.get('FunctionName')),
             'Code': {
@@ -408,25 +765,57 @@ class AWSLambda(AWSBase):
 
             params['Environment'] = {'Variables': nev}
 
-        tmp_path, zip_package = self.get_zipped_package(function_config)
-        
+        return params
+
+    def deploy_function(self, function_config, tmp_path, zip_package):
+        """Upload package and create/update function"""
+        params = self.get_function_params(function_config)
+
         if zip_package:
+            code_sha256 = get_file_sha256(zip_package)
+            if self._args.get('--analyze'):
+                PackageAnalyzer(zip_package).report()
+
             # Only package up lambda function
             if self._args.get('package'):
-                Oprint.info('Generated zipped lambda package {}'.format(zip_package), 'lambda')
+                if self.if_dependency_layer_enabled(function_config):
+                    self.get_dependency_layer_package()
+                Oprint.info('Generated zipped lambda package {} with SHA-256 {}'.format(zip_package, code_sha256), 'lambda')
                 return True
 
-            if self._s3.upload_file(function_config.get('S3Bucket'), zip_package, self.get_zip_name(function_config.get('FunctionName'))):
-                # If function exists
-                info = self.get_function(self.get_lmdo_format_name(function_config.get('FunctionName')))
+            # If function exists
+            info = self.get_function(self.get_lmdo_format_name(function_config.get('FunctionName')))
+
+            state_key = 'function:{}'.format(params.get('FunctionName'))
+            digest = self.get_function_hash(function_config, params, code_sha256)
+            # Heater, dispatcher and event sources are still reconciled
+            if info and self._state.if_unchanged(state_key, digest):
+                Oprint.info('Function {} is unchanged since last deploy, skip updating'.format(params.get('FunctionName')), 'lambda')
+            else:
+                if self.if_dependency_layer_enabled(function_config):
+                    params['Layers'] = [self.get_dependency_layer_arn(function_config.get('S3Bucket'))]
+
+                # Packages are reproducible, same hash means same code
+                if info and info.get('Configuration').get('CodeSha256') == code_sha256:
+                    Oprint.info('Code of function {} is unchanged, skip uploading'.format(info.get('Configuration').get('FunctionName')), 'lambda')
+                    uploaded = False
+                elif self.if_inline_upload_enabled(zip_package):
+                    Oprint.info('Sending package of function {} directly to Lambda'.format(params.get('FunctionName')), 'lambda')
+                    with open(zip_package, 'rb') as f:
+                        params['Code'] = {'ZipFile': f.read()}
+                    uploaded = True
+                else:
+                    uploaded = self._s3.upload_file(function_config.get('S3Bucket'), zip_package, self.get_zip_name(function_config.get('FunctionName')))
+
                 if info:
                     role_arn = function_config.get('RoleArn') or self.create_role(self.get_role_name(function_config.get('FunctionName')), function_config.get('RolePolicy'))
-                    self.update_function_code(info.get('Configuration').get('FunctionName'), function_config.get('S3Bucket'), self.get_zip_name(function_config.get('FunctionName')))
-                   
+                    if uploaded:
+                        self.update_function_code(info.get('Configuration').get('FunctionName'), **params.get('Code'))
+               
                     params.pop('Code')
                     self.update_function_configuration(**params)
                     Oprint.info('Updated lambda function configuration', 'lambda')
-                else:
+                elif uploaded:
                     # User configured role or create a new on based on policy document
                     role_arn = function_config.get('RoleArn') or self.create_role(self.get_role_name(function_config.get('FunctionName')), function_config.get('RolePolicy'))
                     params['Role'] = role_arn
@@ -443,6 +832,60 @@ class AWSLambda(AWSBase):
         # If it has event source configuration
         self.process_event_source(function_config)
 
+        if zip_package:
+            self._state.put(state_key, digest)
+
+        return True
+
+    def get_plan_items(self):
+        """Resources to compare with what is deployed, for plan"""
+        config_data = self.convert_config() or []
+
+        return [('function', self.get_lmdo_format_name(lm.get('FunctionName')), lambda lm=lm: self.plan_function(self.update_function_config(lm))) \
+            for lm in config_data if self.if_function_selected(lm)]
+
+    def plan_function(self, function_config):
+        """
+        Compare function configuration with deployed one, code
+        is compared when the package is in build cache
+        """
+        params = self.get_function_params(function_config)
+        try:
+            live = self._client.get_function_configuration(FunctionName=params.get('FunctionName'))
+        except ClientError as ce:
+            if ce.response['Error']['Code'] == 'ResourceNotFoundException':
+                return 'create', []
+            raise
+
+        changes = [key for key in ['Handler', 'Runtime', 'MemorySize', 'Timeout', 'Description'] if params.get(key) != live.get(key)]
+
+        if (params.get('Environment') or {}).get('Variables', {}) != (live.get('Environment') or {}).get('Variables', {}):
+            changes.append('Environment')
+
+        if params.get('TracingConfig').get('Mode') != (live.get('TracingConfig') or {}).get('Mode'):
+            changes.append('TracingConfig')
+
+        vpc_config = params.get('VpcConfig') or {}
+        live_vpc_config = live.get('VpcConfig') or {}
+        if [key for key in ['SubnetIds', 'SecurityGroupIds'] if sorted(vpc_config.get(key) or []) != sorted(live_vpc_config.get(key) or [])]:
+            changes.append('VpcConfig')
+
+        cached_package = self._build_cache.get(self.get_build_cache_key(function_config)) if self.if_build_cache_enabled() else None
+        if cached_package:
+            if get_file_sha256(cached_package) != live.get('CodeSha256'):
+                changes.append('Code')
+        elif not changes:
+            return 'unknown', ['Code not built, run lmdo lm package to compare']
+
+        return ('update' if changes else 'unchanged'), changes
+
+    def get_function_hash(self, function_config, params, code_sha256):
+        """Hash of package, function parameters and lmdo config of a function"""
+        params = dict([(key, value) for key, value in params.items() if key != 'Code'])
+        layer_key = self.get_dependency_layer_key() if self.if_dependency_layer_enabled(function_config) else None
+
+        return DeployState.get_hash(code_sha256, params, function_config, layer_key)
+
     def update_function_config(self, function_config):
         """Update function config value based on types"""
         # Set default if not set
@@ -476,16 +919,38 @@ class AWSLambda(AWSBase):
         self._iam.delete_lambda_role(self.get_role_name_by_arn(role_arn))
 
     def dependency_packaging(self, tmp_path):
-        """Packaging dependencies"""
+        """
+        Packaging dependencies into tmp_path,
+        returns the sources to stream them from
+        """
         if self._config.get('VirtualEnv'):
-            self.venv_package_install(tmp_path)
-        else:
-            self.package_install(tmp_path)
+            return self.venv_package_install(tmp_path)
+
+        return self.package_install(tmp_path)
+
+    def get_lambda_package_source(self, name, details):
+        """Source for a lambda_packages binary package, extracted once"""
+        Oprint.info('Installing Amazon Linux AMI bianry package {}'.format(name), 'pip')
+        return {'from_path': self._lambda_package_cache.extract(details['path']), 'to_path': '.'}
+
+    def shadow_sources(self, sources):
+        """
+        Stack package directories, a top level package in an
+        earlier directory replaces the same package as a whole
+        """
+        shadowed = []
+        for source in sources:
+            source['shadowed'] = list(shadowed)
+            shadowed += os.listdir(source['from_path'])
+
+        return sources
 
     def package_install(self, tmp_path):
         """Install requirement"""
-        if os.path.isfile('{}/{}'.format(tmp_path, os.getenv('PIP_REQUIREMENTS_FILE', PIP_REQUIREMENTS_FILE))):
-            with open('{}/{}'.format(tmp_path, os.getenv('PIP_REQUIREMENTS_FILE', PIP_REQUIREMENTS_FILE))) as f:
+        sources = []
+        requirements_file = os.path.join(os.getcwd(), os.getenv('PIP_REQUIREMENTS_FILE', PIP_REQUIREMENTS_FILE))
+        if os.path.isfile(requirements_file):
+            with open(requirements_file) as f:
                 requirements = [item.strip().lower() for item in f.read().splitlines() if item.strip()]
             try:
                 lambda_pkg_to_install = {}
@@ -507,26 +972,11 @@ class AWSLambda(AWSBase):
                 # always install setup tool
                 requirements.append('setuptools')
    
-                for name, detail in lambda_pkg_to_install.iteritems():
-                    Oprint.info('Installing Amazon Linux AMI bianry package {} to {}'.format(name, tmp_path), 'pip')
-                    
-                    tar = tarfile.open(detail['path'], mode="r:gz")
-                    for member in tar.getmembers():
-                        if member.isdir():
-                            shutil.rmtree(os.path.join(tmp_path, member.name), ignore_errors=True)
-                            continue
-
-                        #tar.extract(member, os.getenv('PIP_VENDOR_FOLDER', PIP_VENDOR_FOLDER))
-                        tar.extract(member, tmp_path)
-           
-                tmp_requirements = tempfile.NamedTemporaryFile(delete=False)
-                for line in requirements:                     
-                    tmp_requirements.write(line + '\n')
-                tmp_requirements.close()
+                for name, detail in sorted(lambda_pkg_to_install.items()):
+                    sources.append(self.get_lambda_package_source(name, detail))
 
-                Oprint.info('Installing python package dependancies to {}'.format(tmp_path), 'pip')
                 spinner.start()
-                os.system('pip install -t {} -r {} &>/dev/null'.format(tmp_path, tmp_requirements.name))
+                Wheelhouse().install(requirements, tmp_path)
                 spinner.stop()
             except Exception as e:
                 spinner.stop()
@@ -534,13 +984,16 @@ class AWSLambda(AWSBase):
         else:
             Oprint.warn('{} could not be found, no dependencies will be installed'.format(os.getenv('PIP_REQUIREMENTS_FILE', PIP_REQUIREMENTS_FILE)), 'pip')
 
+        # Binary packages take precedence over what pip installed
+        return self.shadow_sources(sources + [{'from_path': tmp_path, 'to_path': '.'}])
+
     def pip_wsgi_install(self, tmp_path):
         """Install requirement for wsgi"""
         try:
             Oprint.info('Installing python package dependancies for wsgi', 'pip')
 
             spinner.start()
-            os.system('pip install werkzeug base58 wsgi-request-logger -t {} &>/dev/null'.format(tmp_path))
+            Wheelhouse().install(['werkzeug', 'base58', 'wsgi-request-logger'], tmp_path)
             spinner.stop()
 
             #Oprint.info('Wsgi python package installation complete', 'pip')
@@ -549,7 +1002,10 @@ class AWSLambda(AWSBase):
             raise e
     
     def venv_package_install(self, tmp_path):
-        """Install virtualenv packages"""
+        """
+        Install virtualenv packages, site-packages are not
+        copied but returned as sources to stream from
+        """
         import pip
         venv = self.get_current_venv_path()
         
@@ -576,39 +1032,22 @@ class AWSLambda(AWSBase):
         
         site_packages = os.path.join(venv, 'lib', 'python2.7', 'site-packages')
         egg_links.extend(glob.glob(os.path.join(site_packages, '*.egg-link')))
-        Oprint.info('Copying lib packages over', 'pip')
-        copytree(site_packages, tmp_path, symlinks=False, ignore=shutil.ignore_patterns(*self.VIRTUALENV_ZIP_EXCLUDES))
        
         # We may have 64-bin specific packages too.
         site_packages_64 = os.path.join(venv, 'lib64', 'python2.7', 'site-packages')
         if os.path.exists(site_packages_64):
             egg_links.extend(glob.glob(os.path.join(site_packages_64, '*.egg-link')))
-            Oprint.info('Copying lib64 packages over', 'pip')
-            copytree(site_packages_64, tmp_path, symlinks=False, ignore=shutil.ignore_patterns(*self.VIRTUALENV_ZIP_EXCLUDES))
 
         if egg_links:
             self.copy_editable_packages(egg_links, tmp_path)
 
-        package_to_keep = []
-        if os.path.isdir(site_packages):
-            package_to_keep += os.listdir(site_packages)
-        if os.path.isdir(site_packages_64):
-            package_to_keep += os.listdir(site_packages_64)
-        
-        installed_packages_name_set = self.get_virtualenv_installed_package()
+        versions = self.get_virtualenv_installed_versions()
+        installed_packages_name_set = list(versions.keys())
         # First, try lambda packages
-        for name, details in lambda_packages.iteritems():
+        lambda_package_sources = []
+        for name, details in sorted(lambda_packages.items()):
             if name.lower() in installed_packages_name_set:
-                Oprint.info('Installing Lambda_package Amazon Linux AMI bianry package {} to {}'.format(name, tmp_path), 'pip')
-                tar = tarfile.open(details['path'], mode="r:gz")
-                for member in tar.getmembers():
-                    # If we can, trash the local version.
-                    if member.isdir():
-                        shutil.rmtree(os.path.join(tmp_path, member.name), ignore_errors=True)
-                        continue
-
-                    tar.extract(member, tmp_path)
-
+                lambda_package_sources.append(self.get_lambda_package_source(name, details))
                 installed_packages_name_set.remove(name.lower())
 
         # Then try to use manylinux packages from PyPi..
@@ -616,23 +1055,48 @@ class AWSLambda(AWSBase):
         try:
             Oprint.info('Installing virtualenv python package dependancies to {}'.format(tmp_path), 'pip')
             spinner.start()
-            for installed_package_name in installed_packages_name_set:
-                wheel_url = self.get_manylinux_wheel(installed_package_name)
-                if wheel_url:
-                    resp = requests.get(wheel_url, timeout=2, stream=True)
-                    resp.raw.decode_content = True
-                    zipresp = resp.raw
-                    with zipfile.ZipFile(BytesIO(zipresp.read())) as zfile:
-                        zfile.extractall(tmp_path)
+            manylinux_wheels = ManylinuxWheels(index_url=self._config.get('PyPIUrl'))
+            wheels = manylinux_wheels.fetch([(name, versions.get(name)) for name in sorted(installed_packages_name_set)])
+            manylinux_wheels.extract(wheels, tmp_path)
             spinner.stop()
         except Exception as e:
             spinner.stop()
             Oprint.warn(e, 'pip')
+
+        # Anything installed in tmp_path overrides binary packages,
+        # which override lib64, which overrides lib
+        sources = [{'from_path': tmp_path, 'to_path': '.'}] + lambda_package_sources
+        for path in [site_packages_64, site_packages]:
+            if os.path.isdir(path):
+                sources.append({
+                    'from_path': path,
+                    'to_path': '.',
+                    'ignore': self.VIRTUALENV_ZIP_EXCLUDES + ['*.egg-link', '*.pyc']
+                })
+
+        return self.shadow_sources(sources)
     
     def get_virtualenv_installed_package(self):
         """Call freeze from shell to get the list of installed packages"""
-        command = ['pip', 'freeze']
-        return [pkg.split('==')[0].lower() for pkg in subprocess.check_output(command).decode('utf-8').splitlines() if pkg.split('==')[0].lower() not in self.VIRTUALENV_EXCLUDE_PACKAGE]
+        return self.get_virtualenv_installed_versions().keys()
+
+    def get_virtualenv_installed_versions(self):
+        """
+        Installed packages from pip freeze with their pinned
+        versions, pip runs once per run
+        """
+        with self._virtualenv_lock:
+            if self._virtualenv_versions is None:
+                command = ['pip', 'freeze']
+                versions = {}
+                for pkg in subprocess.check_output(command).decode('utf-8').splitlines():
+                    name = pkg.split('==')[0].lower()
+                    if name not in self.VIRTUALENV_EXCLUDE_PACKAGE:
+                        versions[name] = pkg.split('==')[1].strip() if '==' in pkg else None
+
+                self._virtualenv_versions = versions
+
+        return self._virtualenv_versions
 
     def copy_editable_packages(self, egg_links, temp_package_path):
         """Copy editable packages"""
@@ -670,23 +1134,6 @@ class AWSLambda(AWSBase):
 
         return venv
 
-    def get_manylinux_wheel(self, package):
-        """
-        For a given package name, returns a link to the download URL,
-        else returns None.
-        """
-        url = 'https://pypi.python.org/pypi/{}/json'.format(package)
-        try:
-            res = requests.get(url, timeout=1.5)
-            data = res.json()
-            version = data['info']['version']
-            for f in data['releases'][version]:
-                if f['filename'].endswith('cp27mu-manylinux1_x86_64.whl'):
-                    return f['url']
-        except Exception, e: # pragma: no cover
-            return None
-        return None
-
     def if_specify_function(self):
         """If user specify a function to process"""
         return False if not self._args.get('--function') else self._args.get('--function')
@@ -748,8 +1195,9 @@ class AWSLambda(AWSBase):
 
     def get_default_event_role_arn(self):
         """Get default event role"""
-        if not self._default_event_role_arn:
-            self._default_event_role_arn = self._iam.create_default_events_role(role_name=self.get_lmdo_format_name('default-events-lambda'))['Role']['Arn']
+        with self._event_role_lock:
+            if not self._default_event_role_arn:
+                self._default_event_role_arn = self._iam.create_default_events_role(role_name=self.get_lmdo_format_name('default-events-lambda'))['Role']['Arn']
 
         return self._default_event_role_arn
 
@@ -872,15 +1320,16 @@ class AWSLambda(AWSBase):
             'Description': 'Lmdo heating function deployed for service {} by lmdo'.format(self._config.get('Service'))
         }
 
-        if not self._heater_arn:
-            info = self.get_function(self.get_lmdo_format_name(self.NAME_HEATER))
-            if not info:
-                self.function_update_or_create(function_config=function_config, ignore_cmd=True)
-            
-            info = self.get_function(self.get_lmdo_format_name(self.NAME_HEATER))
-            self._heater_arn = info.get('Configuration').get('FunctionArn')
-            self.delete_event_permission_to_lambda(self._heater_arn, self.NAME_HEATER)
-            self.add_event_permission_to_lambda(self._heater_arn, self.NAME_HEATER)
+        with self._heater_lock:
+            if not self._heater_arn:
+                info = self.get_function(self.get_lmdo_format_name(self.NAME_HEATER))
+                if not info:
+                    self.function_update_or_create(function_config=function_config, ignore_cmd=True)
+                
+                info = self.get_function(self.get_lmdo_format_name(self.NAME_HEATER))
+                self.delete_event_permission_to_lambda(info.get('Configuration').get('FunctionArn'), self.NAME_HEATER)
+                self.add_event_permission_to_lambda(info.get('Configuration').get('FunctionArn'), self.NAME_HEATER)
+                self._heater_arn = info.get('Configuration').get('FunctionArn')
 
         return self._heater_arn
 
@@ -956,3 +1405,10 @@ class AWSLambda(AWSBase):
                     self._sns.remove_event_source(event)
 
 
+# Instance used by packaging worker processes,
+# set before the pool forks so workers inherit it
+_packager = None
+
+def _package_function(function_config):
+    """Package a function inside a worker process"""
+    return _packager.get_zipped_package(function_config)
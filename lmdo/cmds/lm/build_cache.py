@@ -0,0 +1,126 @@
+import os
+import fnmatch
+import hashlib
+import shutil
+import tempfile
+
+from lmdo.oprint import Oprint
+from lmdo.config import BUILD_CACHE_MAX_ENTRIES
+from lmdo.utils import get_cache_dir
+
+
+class BuildCache(object):
+    """
+    Content-addressed cache of built lambda packages.
+    A package is stored under the hash of everything
+    that goes into it, so unchanged functions can
+    reuse their previous zip
+    """
+    NAME = 'build_cache'
+
+    # Files never shipped, they shouldn't invalidate the cache
+    HASH_IGNORE = ['*.pyc', '.git', '.DS_Store', '.lmdo']
+
+    def __init__(self, cache_dir=None):
+        self._cache_dir = cache_dir or get_cache_dir('build')
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def ignored(self, name):
+        """If file or directory shouldn't be hashed"""
+        for pattern in self.HASH_IGNORE:
+            if fnmatch.fnmatch(name, pattern):
+                return True
+
+        return False
+
+    def hash_file(self, sha, file_path):
+        """Feed file content into hash"""
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                sha.update(chunk)
+
+    def hash_tree(self, sha, path):
+        """Feed relative file names and contents of a directory into hash"""
+        for root, dirs, files in os.walk(path):
+            # Sort in place so the walk order is stable
+            dirs[:] = sorted([d for d in dirs if not self.ignored(d)])
+            for f in sorted(files):
+                if self.ignored(f):
+                    continue
+
+                file_path = os.path.join(root, f)
+                if not os.path.isfile(file_path):
+                    continue
+
+                sha.update(os.path.relpath(file_path, path).encode('utf-8'))
+                self.hash_file(sha, file_path)
+
+    def get_key(self, trees=None, files=None, values=None):
+        """
+        Create cache key from directories, files and
+        plain values that make up the package
+        """
+        sha = hashlib.sha256()
+
+        for value in values or []:
+            sha.update('value:{}\n'.format(value).encode('utf-8'))
+
+        for file_path in files or []:
+            sha.update('file:{}\n'.format(os.path.basename(file_path)).encode('utf-8'))
+            if os.path.isfile(file_path):
+                self.hash_file(sha, file_path)
+
+        for tree in trees or []:
+            sha.update('tree:\n'.encode('utf-8'))
+            if os.path.isdir(tree):
+                self.hash_tree(sha, tree)
+
+        return sha.hexdigest()
+
+    def get_path(self, key):
+        """Cached package location for key"""
+        return os.path.join(self._cache_dir, '{}.zip'.format(key))
+
+    def get(self, key):
+        """Return cached package path or None if it's a miss"""
+        path = self.get_path(key)
+        if os.path.isfile(path):
+            # Touch so pruning keeps recently used packages
+            os.utime(path, None)
+            return path
+
+        return None
+
+    def put(self, key, package_path):
+        """Store a built package in cache"""
+        try:
+            # Copy to a temp file first then rename, so
+            # no one ever sees a half written package
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            os.close(fd)
+            shutil.copyfile(package_path, tmp_path)
+            os.rename(tmp_path, self.get_path(key))
+            self.prune()
+        except (IOError, OSError) as e:
+            Oprint.warn('Cannot cache package {}: {}'.format(package_path, e), self.NAME)
+            return False
+
+        return True
+
+    def prune(self, max_entries=BUILD_CACHE_MAX_ENTRIES):
+        """Remove least recently used packages"""
+        packages = [os.path.join(self._cache_dir, f) for f in os.listdir(self._cache_dir) if f.endswith('.zip')]
+        if len(packages) <= max_entries:
+            return True
+
+        packages.sort(key=os.path.getmtime, reverse=True)
+        for path in packages[max_entries:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        return True
@@ -0,0 +1,62 @@
+import os
+import shutil
+import hashlib
+import tarfile
+import tempfile
+
+from lmdo.oprint import Oprint
+from lmdo.utils import get_cache_dir
+
+
+class LambdaPackageCache(object):
+    """
+    Amazon Linux binary packages from lambda_packages
+    extracted once, packages are streamed from the
+    extracted directory afterwards
+    """
+    NAME = 'pip'
+
+    def __init__(self, cache_dir=None):
+        self._cache_dir = cache_dir or get_cache_dir('lambda_packages')
+        self._paths = {}
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def get_path(self, tar_path):
+        """Extracted location keyed by tarball path and checksum"""
+        tar_path = os.path.abspath(tar_path)
+        if tar_path not in self._paths:
+            sha = hashlib.sha256(tar_path.encode('utf-8'))
+            with open(tar_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    sha.update(chunk)
+
+            self._paths[tar_path] = os.path.join(self._cache_dir, sha.hexdigest())
+
+        return self._paths[tar_path]
+
+    def extract(self, tar_path):
+        """Return extracted directory of tarball, extract it if it's a miss"""
+        path = self.get_path(tar_path)
+        if os.path.isdir(path):
+            return path
+
+        Oprint.info('Extracting Amazon Linux AMI binary package {}'.format(os.path.basename(tar_path)), self.NAME)
+
+        # Extract next to the final location then rename,
+        # so a half extracted package is never used
+        tmp_path = tempfile.mkdtemp(dir=self._cache_dir, suffix='.tmp')
+        try:
+            tar = tarfile.open(tar_path, mode='r:gz')
+            tar.extractall(tmp_path)
+            tar.close()
+            os.rename(tmp_path, path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            # Fine if someone else got there first
+            if not os.path.isdir(path):
+                raise
+
+        return path
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import hashlib
+import zipfile
+import tempfile
+
+try:
+    from urllib2 import urlopen
+    from urlparse import urljoin
+except ImportError:
+    from urllib.request import urlopen
+    from urllib.parse import urljoin
+
+from lmdo.oprint import Oprint
+from lmdo.config import PYPI_URL, MANYLINUX_JOBS, MANYLINUX_METADATA_TTL
+from lmdo.utils import get_cache_dir, parallel_map
+
+
+class ManylinuxWheels(object):
+    """
+    Find and download manylinux wheels of installed packages
+    from a PyPI JSON API. Metadata and wheels are cached on
+    disk and lookups run concurrently
+    """
+    NAME = 'pip'
+    WHEEL_SUFFIX = 'cp27mu-manylinux1_x86_64.whl'
+
+    def __init__(self, index_url=None, cache_dir=None, jobs=MANYLINUX_JOBS):
+        self._index_url = (index_url or os.getenv('LMDO_PYPI_URL', PYPI_URL)).rstrip('/')
+        self._cache_dir = cache_dir or get_cache_dir('manylinux')
+        self._jobs = jobs
+
+        for sub_dir in ['metadata', 'wheels']:
+            path = os.path.join(self._cache_dir, sub_dir)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def write_file(self, path, content):
+        """Write then rename, so readers never see a partial file"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.rename(tmp_path, path)
+
+    def get_metadata_url(self, name, version=None):
+        if version:
+            return '{}/{}/{}/json'.format(self._index_url, name, version)
+
+        return '{}/{}/json'.format(self._index_url, name)
+
+    def get_metadata_cache_file(self, name, version=None):
+        return os.path.join(self._cache_dir, 'metadata', '{}-{}.json'.format(name, version or 'latest'))
+
+    def get_metadata(self, name, version=None):
+        """
+        Package release info from the index. Pinned versions
+        never change so they are cached for good, latest
+        release info expires after MANYLINUX_METADATA_TTL
+        """
+        cache_file = self.get_metadata_cache_file(name, version)
+        if os.path.isfile(cache_file) and (version or time.time() - os.path.getmtime(cache_file) < MANYLINUX_METADATA_TTL):
+            with open(cache_file) as f:
+                return json.load(f)
+
+        content = urlopen(self.get_metadata_url(name, version), timeout=1.5).read()
+        self.write_file(cache_file, content)
+
+        return json.loads(content.decode('utf-8'))
+
+    def get_wheel_info(self, name, version=None):
+        """Manylinux wheel file info of a release, None if there isn't one"""
+        try:
+            files = self.get_metadata(name, version)['urls']
+            metadata_url = self.get_metadata_url(name, version)
+        except Exception:
+            if not version:
+                raise
+            # Some mirrors only serve project level info, keep
+            # the release files so next lookup is from cache
+            metadata_url = self.get_metadata_url(name)
+            files = [dict(f, url=urljoin(metadata_url, f['url'])) for f in self.get_metadata(name)['releases'].get(version) or []]
+            self.write_file(self.get_metadata_cache_file(name, version), json.dumps({'urls': files}).encode('utf-8'))
+
+        for f in files:
+            if f['filename'].endswith(self.WHEEL_SUFFIX):
+                # Mirrors may give links relative to the metadata
+                return dict(f, url=urljoin(metadata_url, f['url']))
+
+        return None
+
+    def get_wheel(self, name, version=None):
+        """Local path of package wheel, downloaded if it's not in cache"""
+        info = self.get_wheel_info(name, version)
+        if not info:
+            return None
+
+        wheel_path = os.path.join(self._cache_dir, 'wheels', info['filename'])
+        if os.path.isfile(wheel_path):
+            return wheel_path
+
+        content = urlopen(info['url'], timeout=30).read()
+        sha256 = (info.get('digests') or {}).get('sha256')
+        if sha256 and hashlib.sha256(content).hexdigest() != sha256:
+            Oprint.warn('Checksum of {} doesn\'t match, skipped'.format(info['filename']), self.NAME)
+            return None
+
+        self.write_file(wheel_path, content)
+        Oprint.info('Downloaded {}'.format(info['filename']), self.NAME)
+
+        return wheel_path
+
+    def fetch(self, packages):
+        """
+        Wheels for packages, a list of (name, version) with version
+        None for latest. Packages without manylinux wheel are left out
+        """
+        def fetch_one(package):
+            try:
+                return self.get_wheel(*package)
+            except Exception:
+                # Not on the index or no connection, the package
+                # from virtualenv is used instead
+                return None
+
+        wheels = parallel_map(fetch_one, packages, self._jobs)
+
+        return [wheel for wheel in wheels if wheel]
+
+    def extract(self, wheels, target):
+        """Unpack wheels to target in order"""
+        for wheel in wheels:
+            with zipfile.ZipFile(wheel) as package:
+                package.extractall(target)
+
+        return True
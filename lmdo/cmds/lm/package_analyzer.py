@@ -0,0 +1,77 @@
+from __future__ import print_function
+import os
+import zipfile
+
+from lmdo.oprint import Oprint
+
+
+class PackageAnalyzer(object):
+    """Break down what takes space in a lambda package"""
+    NAME = 'lambda'
+
+    def __init__(self, package_path, prefix=''):
+        self._package_path = package_path
+        # Layers keep content under a runtime directory
+        self._prefix = prefix
+
+    @classmethod
+    def format_size(cls, size):
+        for unit in ['B', 'KB', 'MB']:
+            if size < 1024:
+                return '{:.1f}{}'.format(size, unit)
+            size /= 1024.0
+
+        return '{:.1f}GB'.format(size)
+
+    def get_entries(self):
+        """Files in package as (name relative to prefix, compressed, uncompressed)"""
+        with zipfile.ZipFile(self._package_path) as package:
+            for info in package.infolist():
+                name = info.filename
+                if self._prefix and name.startswith(self._prefix):
+                    name = name[len(self._prefix):]
+
+                yield name, info.compress_size, info.file_size
+
+    def get_sizes(self, group):
+        """Sum sizes of entries per group name"""
+        sizes = {}
+        for name, compressed, uncompressed in self.get_entries():
+            size = sizes.setdefault(group(name), [0, 0, 0])
+            size[0] += compressed
+            size[1] += uncompressed
+            size[2] += 1
+
+        return sorted(sizes.items(), key=lambda item: item[1][0], reverse=True)
+
+    def by_package(self):
+        """Sizes per top level package or module"""
+        return self.get_sizes(lambda name: name.split('/')[0])
+
+    def by_directory(self):
+        """Sizes per directory"""
+        return self.get_sizes(lambda name: os.path.dirname(name) or '.')
+
+    def print_table(self, title, sizes, limit):
+        print('{:<60} {:>10} {:>12} {:>7}'.format(title, 'Compressed', 'Uncompressed', 'Files'))
+        for name, (compressed, uncompressed, files) in sizes[:limit]:
+            print('{:<60} {:>10} {:>12} {:>7}'.format(name, self.format_size(compressed), self.format_size(uncompressed), files))
+
+        if len(sizes) > limit:
+            print('... {} more'.format(len(sizes) - limit))
+
+        print('')
+
+    def report(self, limit=20):
+        """Print size breakdown of package"""
+        entries = list(self.get_entries())
+        Oprint.info('Package {}: {} compressed, {} uncompressed, {} files'.format(
+            os.path.basename(self._package_path),
+            self.format_size(sum([entry[1] for entry in entries])),
+            self.format_size(sum([entry[2] for entry in entries])),
+            len(entries)), self.NAME)
+
+        self.print_table('Package', self.by_package(), limit)
+        self.print_table('Directory', self.by_directory(), limit)
+
+        return True
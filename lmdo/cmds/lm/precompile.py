@@ -0,0 +1,82 @@
+"""
+Byte-compile python sources of a lambda package.
+
+Run by the interpreter of the target runtime:
+
+    python3.8 precompile.py <dir> <runtime dir> <source mtime>
+
+Python 3.7+ writes unchecked hash-based pycs so they stay
+valid whatever timestamps the files get when extracted.
+Older versions write timestamp-based pycs stamped with
+the fixed mtime of package entries.
+
+Only standard library, must run on both python 2 and 3
+"""
+import os
+import sys
+import struct
+import marshal
+import py_compile
+
+
+def get_magic():
+    try:
+        from importlib.util import MAGIC_NUMBER
+        return MAGIC_NUMBER
+    except ImportError:
+        import imp
+        return imp.get_magic()
+
+def get_pyc_path(path):
+    if sys.version_info[0] >= 3:
+        from importlib.util import cache_from_source
+        return cache_from_source(path)
+
+    return path + 'c'
+
+def compile_timestamp(path, pyc_path, dfile, mtime):
+    """Write pyc header by hand so mtime matches the packaged source"""
+    with open(path, 'rb') as f:
+        source = f.read()
+
+    code = compile(source, dfile, 'exec', dont_inherit=True)
+
+    header = get_magic() + struct.pack('<I', mtime)
+    if sys.version_info[0] >= 3:
+        header += struct.pack('<I', len(source) & 0xFFFFFFFF)
+
+    pyc_dir = os.path.dirname(pyc_path)
+    if pyc_dir and not os.path.isdir(pyc_dir):
+        os.makedirs(pyc_dir)
+
+    with open(pyc_path, 'wb') as f:
+        f.write(header)
+        f.write(marshal.dumps(code))
+
+def main(top, runtime_dir, mtime):
+    failed = 0
+    for root, dirs, files in os.walk(top):
+        for name in files:
+            if not name.endswith('.py'):
+                continue
+
+            path = os.path.join(root, name)
+            dfile = os.path.join(runtime_dir, os.path.relpath(path, top))
+            try:
+                if sys.version_info >= (3, 7):
+                    py_compile.compile(path, get_pyc_path(path), dfile, doraise=True,
+                        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+                else:
+                    compile_timestamp(path, get_pyc_path(path), dfile, mtime)
+            except Exception:
+                # Sources that don't compile for this runtime
+                # are left to fail at import as they would anyway
+                failed += 1
+
+    if failed:
+        sys.stderr.write('{0} files could not be compiled\n'.format(failed))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1], sys.argv[2], int(sys.argv[3])))
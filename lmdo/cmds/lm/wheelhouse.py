@@ -0,0 +1,129 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import tempfile
+import subprocess
+from distutils.util import get_platform
+
+from lmdo.oprint import Oprint
+from lmdo.utils import get_cache_dir
+from lmdo.config import WHEELHOUSE_TTL
+
+
+class Wheelhouse(object):
+    """
+    Local store of built wheels per runtime and platform.
+    A set of pinned requirements is fetched once, later installs
+    of the same requirements don't touch the network. Unpinned
+    ones are fetched again after WHEELHOUSE_TTL
+    """
+    NAME = 'pip'
+    PINNED_REGX = r'^[a-z0-9._-]+(\[[^\]]*\])?\s*==\s*[^\s,;*]+\s*(;.*)?$'
+
+    def __init__(self, cache_dir=None):
+        self._cache_dir = cache_dir or get_cache_dir(os.path.join('wheelhouse', self.get_platform_tag()))
+        self._marker_dir = os.path.join(self._cache_dir, '.requirements')
+        if not os.path.isdir(self._marker_dir):
+            os.makedirs(self._marker_dir)
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @classmethod
+    def get_platform_tag(cls):
+        """Wheels are only reusable for the same runtime and platform"""
+        return 'python{}.{}-{}'.format(sys.version_info[0], sys.version_info[1], get_platform())
+
+    @classmethod
+    def normalise(cls, requirements):
+        """Requirement lines without comments, blanks, case or order differences"""
+        lines = [re.sub(r'(^|\s)#.*$', '', item).lower() for item in requirements]
+        return sorted(set([' '.join(line.split()) for line in lines if line.strip()]))
+
+    def get_key(self, requirements):
+        """Hash of normalised requirements"""
+        return hashlib.sha256('\n'.join(self.normalise(requirements)).encode('utf-8')).hexdigest()
+
+    def get_marker(self, key):
+        return os.path.join(self._marker_dir, key)
+
+    @classmethod
+    def if_pinned(cls, requirements):
+        """If every requirement is pinned to an exact version"""
+        return all([re.match(cls.PINNED_REGX, line) for line in cls.normalise(requirements)])
+
+    def has(self, requirements):
+        """If wheels for requirements have been fetched and are still fresh"""
+        marker = self.get_marker(self.get_key(requirements))
+        if not os.path.isfile(marker):
+            return False
+
+        return self.if_pinned(requirements) or time.time() - os.path.getmtime(marker) < WHEELHOUSE_TTL
+
+    def pip(self, args):
+        """Run pip with the current interpreter, show its output only if it fails"""
+        command = [sys.executable, '-m', 'pip'] + args
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+
+        if process.returncode != 0:
+            Oprint.warn(output.decode('utf-8', 'replace'), self.NAME)
+            return False
+
+        return True
+
+    def fetch(self, requirements_file):
+        """
+        Build wheels into the wheelhouse, wheels already
+        there are reused so only new pins are downloaded
+        """
+        Oprint.info('Fetching wheels for {} into {}'.format(requirements_file, self._cache_dir), self.NAME)
+        return self.pip(['wheel', '-q', '-w', self._cache_dir, '--find-links', self._cache_dir, '-r', requirements_file])
+
+    def refresh(self, requirements, requirements_file):
+        """Fetch wheels for requirements and mark them fetched"""
+        marker = self.get_marker(self.get_key(requirements))
+        if os.path.isfile(marker):
+            os.remove(marker)
+
+        if not self.fetch(requirements_file):
+            Oprint.err('Cannot fetch wheels for requirements', self.NAME)
+
+        open(marker, 'w').close()
+
+        return True
+
+    def install(self, requirements, target):
+        """Install requirements to target from local wheels"""
+        requirements = self.normalise(requirements)
+        if not requirements:
+            return True
+
+        tmp_requirements = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
+        try:
+            tmp_requirements.write('\n'.join(requirements) + '\n')
+            tmp_requirements.close()
+
+            fetched = not self.has(requirements)
+            if fetched:
+                self.refresh(requirements, tmp_requirements.name)
+
+            Oprint.info('Installing python package dependancies to {} from {}'.format(target, self._cache_dir), self.NAME)
+            install = ['install', '-q', '--no-index', '--find-links', self._cache_dir, '-t', target, '-r', tmp_requirements.name]
+            installed = self.pip(install)
+
+            # Wheels may have been removed from the wheelhouse since
+            if not installed and not fetched:
+                Oprint.warn('Wheels missing from {}, fetching them again'.format(self._cache_dir), self.NAME)
+                self.refresh(requirements, tmp_requirements.name)
+                installed = self.pip(install)
+
+            if not installed:
+                Oprint.err('Cannot install requirements from wheelhouse {}'.format(self._cache_dir), self.NAME)
+        finally:
+            os.remove(tmp_requirements.name)
+
+        return True
@@ -0,0 +1,78 @@
+from __future__ import print_function
+import os
+
+from lmdo.cmds.cf.cloudformation import Cloudformation
+from lmdo.cmds.lm.aws_lambda import AWSLambda
+from lmdo.cmds.api.apigateway import Apigateway
+from lmdo.cmds.cwe.cloudwatch_event import CloudWatchEvent
+from lmdo.cmds.client_factory import ClientFactory
+from lmdo.oprint import Oprint
+from lmdo.config import PLAN_JOBS
+from lmdo.utils import parallel_map
+
+
+class PlanClient(ClientFactory):
+    """
+    Show what deploy would change, local config is compared
+    with live resources without modifying anything
+    """
+    NAME = 'plan'
+    ACTIONS = ['create', 'update', 'unchanged', 'unknown']
+
+    def __init__(self, args):
+        self._args = args
+
+    def get_jobs(self):
+        try:
+            return max(1, int(os.getenv('LMDO_PLAN_JOBS', PLAN_JOBS)))
+        except ValueError:
+            Oprint.err('LMDO_PLAN_JOBS must be a number', self.NAME)
+
+    def get_plan_items(self):
+        """(type, name, func) of everything configured"""
+        items = []
+        for resource_type, handler_class in [('stack', Cloudformation), ('function', AWSLambda), ('api', Apigateway), ('rule', CloudWatchEvent)]:
+            try:
+                items += handler_class().get_plan_items()
+            except (Exception, SystemExit) as e:
+                # Config referring to stacks not deployed yet
+                # can't be resolved, report instead of stopping
+                items.append((resource_type, '*', lambda e=e: ('unknown', [self.get_error(e)])))
+
+        return items
+
+    @classmethod
+    def get_error(cls, e):
+        if isinstance(e, SystemExit):
+            return 'failed to resolve'
+
+        return str(e) or e.__class__.__name__
+
+    def plan_item(self, item):
+        resource_type, name, func = item
+        try:
+            action, changes = func()
+        except (Exception, SystemExit) as e:
+            action, changes = 'unknown', [self.get_error(e)]
+
+        return resource_type, name, action, changes
+
+    def report(self, results):
+        print('{:<10} {:<50} {:<10} {}'.format('Type', 'Name', 'Action', 'Changes'))
+        for resource_type, name, action, changes in results:
+            print('{:<10} {:<50} {:<10} {}'.format(resource_type, name, action, ', '.join(changes)))
+        print('')
+
+        counts = [(action, len([result for result in results if result[2] == action])) for action in self.ACTIONS]
+        Oprint.info('Plan: {}'.format(', '.join(['{} to {}'.format(count, action) if action in ['create', 'update'] else '{} {}'.format(count, action) for action, count in counts])), self.NAME)
+
+    def execute(self):
+        items = self.get_plan_items()
+        if not items:
+            Oprint.info('Nothing configured to plan', self.NAME)
+            return True
+
+        Oprint.info('Comparing {} resources with live state'.format(len(items)), self.NAME)
+        self.report(parallel_map(self.plan_item, items, self.get_jobs()))
+
+        return True
@@ -1,22 +1,34 @@
 from __future__ import print_function
 import os
-import fnmatch
+import hashlib
 import mimetypes
 
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
 from lmdo.cmds.aws_base import AWSBase
 from lmdo.oprint import Oprint
+from lmdo.path_filter import PathFilter
 from lmdo.utils import sys_pause
 from lmdo.waiters.s3_waiters import S3WaiterBucketCreate, S3WaiterBucketDelete, S3WaiterObjectCreate
 from lmdo.config import S3_UPLOAD_EXCLUDE, PROJECT_CONFIG_FILE
 from lmdo.file_upload_progress import FileUploadProgress
+from lmdo.transfer_stats import TransferStats
 
 
 class S3(AWSBase):
     """S3 handler"""
+    # Object metadata holding sha256 of uploaded content
+    CONTENT_HASH_KEY = 'lmdo-sha256'
+    # Shared by all handlers so a deploy reports all its uploads
+    stats = TransferStats()
+    _transfer_config = None
+
     def __init__(self):
         super(S3, self).__init__()
         self._client = self.get_client('s3')
         self._resource = self.get_resource('s3')
+        self._known_buckets = set()
 
     @property
     def client(self):
@@ -35,6 +47,8 @@ class S3(AWSBase):
         for f in files:
             self.upload_file(self._config.get('AssetS3Bucket'), f.get('path'), f.get('key'), ExtraArgs=f.get('extra_args'))
 
+        self.stats.report()
+
     def if_bucket_exist(self, bucket_name):
         """Check if bucket exist"""
         if self._resource.Bucket(bucket_name) in self._resource.buckets.all():
@@ -57,22 +71,124 @@ class S3(AWSBase):
 
         return True
 
-    def upload_file(self, bucket_name, file_path, key, **kwargs):
-        """Upload file to S3, provide network progress bar"""
-        # Check if bucket exist, create one if user agrees
+    def ensure_bucket(self, bucket_name):
+        """Check if bucket exist, create one if user agrees"""
+        if bucket_name in self._known_buckets:
+            return True
+
         if not self.if_bucket_exist(bucket_name):
             sys_pause('Bucket {} doesn\'t exist! Do you want to create it? [yes/no]'.format(bucket_name), 'yes')
             self.create_bucket(bucket_name)
 
-        file_size = os.path.getsize(file_path)/1000000
-        if round(file_size) <= 0:
-            file_size = 'size:{}B'.format(os.path.getsize(file_path))
-        else:
-            file_size = 'size:{}MB'.format(file_size)
+        self._known_buckets.add(bucket_name)
+
+        return True
+
+    def get_transfer_config(self):
+        """
+        Multipart settings from S3Transfer config, sizes in MB
+        and bandwidth in MB/s. Built once and shared
+        """
+        if S3._transfer_config is None:
+            settings = self._config.get('S3Transfer') or {}
+            kwargs = {}
+            for key, arg, scale in [
+                ('MultipartThreshold', 'multipart_threshold', 1024 * 1024),
+                ('MultipartChunkSize', 'multipart_chunksize', 1024 * 1024),
+                ('MaxConcurrency', 'max_concurrency', 1)]:
+                if settings.get(key):
+                    kwargs[arg] = int(float(settings.get(key)) * scale)
+
+            transfer_config = TransferConfig(**kwargs)
+            if settings.get('MaxBandwidth'):
+                # Not taken by boto3 constructor, s3transfer honours it
+                transfer_config.max_bandwidth = int(float(settings.get('MaxBandwidth')) * 1024 * 1024)
+
+            S3._transfer_config = transfer_config
+
+        return S3._transfer_config
+
+    def if_conditional_upload_enabled(self):
+        """Skip uploading content that's already in bucket unless disabled"""
+        return self._config.get('ConditionalUpload') is not False
+
+    def get_content_hashes(self, file_path):
+        """
+        Sha256 of file and the ETags S3 would give it,
+        for a single part and a multipart upload
+        """
+        chunk_size = self.get_transfer_config().multipart_chunksize
+        sha = hashlib.sha256()
+        md5 = hashlib.md5()
+        part_digests = []
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+                md5.update(chunk)
+                part_digests.append(hashlib.md5(chunk).digest())
+
+        multipart_etag = '{}-{}'.format(hashlib.md5(b''.join(part_digests)).hexdigest(), len(part_digests))
+
+        return sha.hexdigest(), md5.hexdigest(), multipart_etag
+
+    def get_object_info(self, bucket_name, key):
+        """head_object response, None if object isn't there or can't be read"""
+        try:
+            return self._client.head_object(Bucket=bucket_name, Key=key)
+        except ClientError:
+            return None
+
+    def if_object_unchanged(self, bucket_name, key, content_hashes):
+        """Check if object in bucket has the same content as local file"""
+        info = self.get_object_info(bucket_name, key)
+        if not info:
+            return False
+
+        sha256, md5, multipart_etag = content_hashes
+        stored_sha256 = (info.get('Metadata') or {}).get(self.CONTENT_HASH_KEY)
+        if stored_sha256:
+            return stored_sha256 == sha256
+
+        # ETag isn't an MD5 of content for KMS encrypted objects
+        if info.get('ServerSideEncryption') == 'aws:kms':
+            return False
+
+        return info.get('ETag', '').strip('"') in [md5, multipart_etag]
+
+    @classmethod
+    def format_size(cls, size):
+        if round(size/1000000) <= 0:
+            return '{}B'.format(size)
+
+        return '{}MB'.format(size/1000000)
+
+    def upload_file(self, bucket_name, file_path, key, **kwargs):
+        """
+        Upload file to S3, provide network progress bar. Upload
+        is skipped if bucket already has the same content
+        """
+        self.ensure_bucket(bucket_name)
+
+        size = os.path.getsize(file_path)
+        extra_args = dict(kwargs.pop('ExtraArgs', None) or {})
+        if self.if_conditional_upload_enabled():
+            content_hashes = self.get_content_hashes(file_path)
+            if self.if_object_unchanged(bucket_name, key, content_hashes):
+                self.stats.add_skipped(size)
+                Oprint.info('{} is unchanged in S3 bucket {}, skip uploading. (size:{})'.format(key, bucket_name, self.format_size(size)), 's3')
+                return True
+
+            extra_args['Metadata'] = dict(extra_args.get('Metadata') or {}, **{self.CONTENT_HASH_KEY: content_hashes[0]})
+
+        if extra_args:
+            kwargs['ExtraArgs'] = extra_args
+
+        file_size = 'size:{}'.format(self.format_size(size))
 
         Oprint.info('Start uploading {} to S3 bucket {}. ({})'.format(key, bucket_name, file_size), 's3')
         #waiter = S3WaiterObjectCreate(self._client)
-        self._client.upload_file(file_path, bucket_name, key, Callback=FileUploadProgress(file_path), **kwargs)
+        with self.stats.timer(size):
+            self._client.upload_file(file_path, bucket_name, key, Callback=FileUploadProgress(file_path), Config=self.get_transfer_config(), **kwargs)
 
         #waiter.wait(bucket_name, key)
         Oprint.info('Complete uploading {}. ({})'.format(key, file_size), 's3')
@@ -104,45 +220,18 @@ class S3(AWSBase):
             }
         """
         output = []
-        for root, dirs, files in os.walk(from_path):
-            if not exclude:
-                for f in files:
-                    abs_path = os.path.join(root, f)
-                    data = {
-                        'path': abs_path,
-                        'key': os.path.relpath(abs_path, asset_dir)
-                    }
-
-                    data['extra_args'] = {'ContentType': self.guess_mime_type(os.path.relpath(abs_path, asset_dir))}
-
-                    output.append(data)
-            else:
-                for f in files:
-                    excl = False
-
-                    #check if file/folder should be excluded
-                    if exclude['dir']:
-                        for ex_dir in exclude['dir']:
-                            if fnmatch.fnmatch(root, ex_dir):
-                                excl = True
-                                break
-
-                    if exclude['file']:
-                        for ex_file in exclude['file']:
-                            if fnmatch.fnmatch(f, ex_file):
-                                excl = True
-                                break
-
-                    if not excl:
-                        abs_path = os.path.join(root, f)
-                        data = {
-                            'path': abs_path,
-                            'key': os.path.relpath(abs_path, asset_dir)
-                        }
-
-                        data['extra_args'] = {'ContentType': self.guess_mime_type(os.path.relpath(abs_path, asset_dir))}
-
-                        output.append(data)
+        path_filter = PathFilter.from_ignore_file(from_path, exclude=exclude)
+        for root, rel_root, dirs, files in path_filter.walk(from_path):
+            for f in files:
+                abs_path = os.path.join(root, f)
+                data = {
+                    'path': abs_path,
+                    'key': os.path.relpath(abs_path, asset_dir)
+                }
+
+                data['extra_args'] = {'ContentType': self.guess_mime_type(os.path.relpath(abs_path, asset_dir))}
+
+                output.append(data)
 
         return output
 
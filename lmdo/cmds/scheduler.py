@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+from lmdo.oprint import Oprint
+from lmdo.utils import SafeTask, TaskFailure
+
+
+class Scheduler(object):
+    """
+    Run named tasks once the tasks they require are done,
+    tasks that don't depend on each other run concurrently
+    """
+    NAME = 'lmdo'
+
+    def __init__(self):
+        self._tasks = OrderedDict()
+
+    def add(self, name, func, requires=None):
+        """Add task, func takes no argument"""
+        self._tasks[name] = (func, list(requires or []))
+        return self
+
+    def get_requires(self, name):
+        return self._tasks[name][1]
+
+    def call(self, name):
+        return self._tasks[name][0]()
+
+    def reverse(self):
+        """Same tasks with dependencies turned around, for tearing down"""
+        scheduler = Scheduler()
+        for name in self._tasks:
+            requires = [other for other in self._tasks if name in self.get_requires(other)]
+            scheduler.add(name, self._tasks[name][0], requires)
+
+        return scheduler
+
+    def get_order(self):
+        """Task names in an order that satisfies dependencies"""
+        order = []
+        visiting = set()
+
+        def visit(name, path):
+            if name in order:
+                return
+            if name not in self._tasks:
+                Oprint.err('Task {} required by {} doesn\'t exist'.format(name, path[-1]), self.NAME)
+            if name in visiting:
+                Oprint.err('Circular dependency: {}'.format(' -> '.join(path + [name])), self.NAME)
+
+            visiting.add(name)
+            for required in self.get_requires(name):
+                visit(required, path + [name])
+            order.append(name)
+
+        for name in self._tasks:
+            visit(name, [])
+
+        return order
+
+    def run(self, jobs=None):
+        """
+        Run all tasks, at most jobs at a time. Tasks requiring
+        a failed task are skipped, exit if anything failed
+        """
+        order = self.get_order()
+        if not order:
+            return True
+
+        results = Queue()
+        done, failed, started = set(), set(), set()
+        pool = ThreadPool(jobs or len(order))
+        try:
+            while len(done) + len(failed) < len(order):
+                for name in order:
+                    if name in started:
+                        continue
+
+                    requires = self.get_requires(name)
+                    if [required for required in requires if required in failed]:
+                        Oprint.warn('Skip {} as a task it requires failed'.format(name), self.NAME)
+                        started.add(name)
+                        failed.add(name)
+                    elif all([required in done for required in requires]):
+                        started.add(name)
+                        pool.apply_async(SafeTask(self.call), (name,), callback=lambda result, name=name: results.put((name, result)))
+
+                if len(done) + len(failed) == len(order):
+                    break
+
+                # Timeout keeps python 2 responsive to Ctrl-C
+                name, result = results.get(True, 365 * 24 * 3600)
+                if isinstance(result, TaskFailure):
+                    failed.add(name)
+                else:
+                    done.add(name)
+        finally:
+            pool.close()
+            pool.join()
+
+        if failed:
+            Oprint.err('{} of {} tasks failed or were skipped: {}'.format(len(failed), len(order), ', '.join([name for name in order if name in failed])), self.NAME)
+
+        return True
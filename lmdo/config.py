@@ -1,11 +1,16 @@
 """
 lmdo system configuration
 """
+import os
 
 # File for lmdo project config data
 PROJECT_CONFIG_TEMPLATE = 'lmdo.yaml.j2'
 PROJECT_CONFIG_FILE = 'lmdo.yaml'
 
+# Connections each shared AWS client keeps open, enough
+# for the concurrent uploads, deploys and lookups lmdo runs
+AWS_MAX_POOL_CONNECTIONS = 25
+
 # PIP
 PIP_VENDOR_FOLDER = 'vendored'
 PIP_REQUIREMENTS_FILE = 'requirements.txt'
@@ -17,22 +22,52 @@ CLOUDFORMATION_TEMPLATE = 'main'
 CLOUDFORMATION_PARAMETER_FILE = 'params.json'
 CLOUDFORMATION_STACK_LOCK_POLICY = 'stack_lock_policy.json'
 CLOUDFORMATION_STACK_UNLOCK_POLICY = 'stack_unlock_policy.json'
+# Seconds between stack event polls, grows while a stack is quiet
+CLOUDFORMATION_EVENT_POLL_MIN = 2
+CLOUDFORMATION_EVENT_POLL_MAX = 20
+# Stack event calls per second shared by all stacks being watched
+CLOUDFORMATION_WATCH_RATE = 2
+# Templates validated at once
+CLOUDFORMATION_VALIDATE_JOBS = 8
 
 # Lambda
 LAMBDA_MEMORY_SIZE = 128
 LAMBDA_RUNTIME= 'python2.7'
 LAMBDA_TIMEOUT = 180
+# Largest zipped package Lambda takes without S3
+LAMBDA_INLINE_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+
+# PyPI JSON API used to find manylinux wheels
+PYPI_URL = 'https://pypi.org/pypi'
+MANYLINUX_JOBS = 8
+MANYLINUX_METADATA_TTL = 86400
+
+# Seconds fetched wheels of unpinned requirements are reused
+WHEELHOUSE_TTL = 86400
+
+# Local cache for lmdo build artifacts
+LMDO_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.lmdo', 'cache')
+BUILD_CACHE_MAX_ENTRIES = 50
+VALIDATION_CACHE_MAX_ENTRIES = 1000
 
-# Files and directories excluding from packaging
+# Resources compared with live state at once by lmdo plan
+PLAN_JOBS = 8
+
+# What was last deployed from the project, relative to project root
+DEPLOY_STATE_FILE = os.path.join('.lmdo', 'state.json')
+
+# Files and directories excluding from packaging, project
+# only directories are anchored so dependencies keep theirs
 LAMBDA_EXCLUDE= {
     'dir': [
-        'tests',
+        '/tests',
         '*botocore*',
         '*boto3*',
         '*.git*',
-        '.cache',
-        'cloudformation',
-        'swagger',
+        '/.cache',
+        '/.lmdo',
+        '/cloudformation',
+        '/swagger',
     ],
     'file': [
         'lmdo.yaml',
@@ -41,6 +76,25 @@ LAMBDA_EXCLUDE= {
         '.coverage',
         '.travis.yml',
         'requirement.txt',
+        '.lmdoignore',
+    ]
+}
+
+# Already compressed content, stored in packages without deflating again
+ZIP_STORED_EXTENSIONS = [
+    '.zip', '.whl', '.egg', '.jar',
+    '.gz', '.tgz', '.bz2', '.xz',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp',
+]
+
+# Extra excludes for installed dependencies when SlimPackages is on
+LAMBDA_SLIM_EXCLUDE = {
+    'dir': [
+        '__pycache__',
+        'docs',
+    ],
+    'file': [
+        '*.dist-info/RECORD',
     ]
 }
 
@@ -63,7 +117,8 @@ S3_UPLOAD_EXCLUDE = {
         '*.md'
     ],
     'file': [
-        '.DS_Store'
+        '.DS_Store',
+        '.lmdoignore'
     ]
 }
 
@@ -15,6 +15,11 @@ class NestedTemplateUrlConvertor(ChainProcessor, Convertor):
     """
     SEARCH_REGX = r'\$template\|[^"\', \r\n]+'
 
+    def __init__(self, stack_name=None):
+        super(NestedTemplateUrlConvertor, self).__init__()
+        # Templates are uploaded per stack
+        self._stack_name = stack_name
+
     @classmethod
     def match(cls, haystack):
         return re.findall(cls.SEARCH_REGX, str(haystack))
@@ -67,7 +72,7 @@ class NestedTemplateUrlConvertor(ChainProcessor, Convertor):
 
         for template_name in template_names:
             template_file_name = template_name.split('/').pop()
-            url = aws.get_template_s3_url(template_name=template_file_name)
+            url = aws.get_template_s3_url(template_name=template_file_name, stack_name=self._stack_name)
             from_str = '$template|{}'.format(template_name)
             replacement[from_str] = url                
          
@@ -0,0 +1,64 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+from lmdo.config import DEPLOY_STATE_FILE
+from lmdo.utils import mkdir
+
+
+class DeployState(object):
+    """
+    Hashes of resource inputs as of their last successful
+    deploy, kept per stage and region so unchanged resources
+    can be skipped. Shared file, writes are serialised
+    """
+    _lock = threading.Lock()
+
+    def __init__(self, scope, force=False, path=None):
+        self._scope = scope
+        self._force = force
+        self._path = path or os.getenv('LMDO_STATE_FILE', DEPLOY_STATE_FILE)
+
+    @property
+    def path(self):
+        return self._path
+
+    @classmethod
+    def get_hash(cls, *values):
+        """Hash of json serialisable values"""
+        return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def load(self):
+        if not os.path.isfile(self._path):
+            return {}
+
+        try:
+            with open(self._path) as f:
+                return json.load(f)
+        except ValueError:
+            # Corrupted state only means redeploying
+            return {}
+
+    def get(self, resource):
+        return self.load().get(self._scope, {}).get(resource)
+
+    def if_unchanged(self, resource, digest):
+        """If resource was deployed from the same inputs, never with --force"""
+        return not self._force and self.get(resource) == digest
+
+    def put(self, resource, digest):
+        """Record inputs of a successful deploy"""
+        with self._lock:
+            state = self.load()
+            state.setdefault(self._scope, {})[resource] = digest
+
+            state_dir = os.path.dirname(self._path) or '.'
+            mkdir(state_dir)
+            fd, tmp_path = tempfile.mkstemp(dir=state_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.rename(tmp_path, self._path)
+
+        return True
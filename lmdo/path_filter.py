@@ -0,0 +1,136 @@
+import os
+import re
+import fnmatch
+
+
+class PathFilter(object):
+    """
+    Decide which files and directories of a tree are left out.
+    Patterns follow .gitignore style:
+
+        'name'       matches file or directory name at any depth
+        'dir/name'   matches path relative to the top of the tree
+        '/name'      matches at the top of the tree only
+        'name/'      matches directories only
+
+    exclude takes lmdo exclude config:
+
+        exclude = {
+            'dir': [],
+            'file': [],
+            'file_with_path': []  # matched against source path
+        }
+
+    All patterns of a kind are compiled into a single
+    regular expression, excluded directories are pruned
+    from walks so they are never read
+    """
+    IGNORE_FILE = '.lmdoignore'
+
+    def __init__(self, patterns=None, exclude=None):
+        exclude = exclude or {}
+        patterns = patterns or []
+
+        dir_patterns = [p.rstrip('/') for p in patterns] + list(exclude.get('dir') or [])
+        file_patterns = [p for p in patterns if not p.endswith('/')] + list(exclude.get('file') or [])
+
+        self._dir_name, self._dir_path = self.compile_split(dir_patterns)
+        self._file_name, self._file_path = self.compile_split(file_patterns)
+        self._source_path = self.compile(exclude.get('file_with_path') or [])
+
+    @classmethod
+    def compile(cls, patterns):
+        """Compile glob patterns into one regular expression"""
+        if not patterns:
+            return None
+
+        regexes = []
+        for pattern in patterns:
+            regex = fnmatch.translate(pattern)
+            # Python 2 appends global flags, set them once instead
+            if regex.endswith('(?ms)'):
+                regex = regex[:-len('(?ms)')]
+            regexes.append('(?:{})'.format(regex))
+
+        return re.compile('(?ms)' + '|'.join(regexes))
+
+    @classmethod
+    def compile_split(cls, patterns):
+        """Compile name only and relative path patterns separately"""
+        names = [p for p in patterns if '/' not in p]
+        paths = [p.lstrip('/') for p in patterns if '/' in p]
+
+        return cls.compile(names), cls.compile(paths)
+
+    @classmethod
+    def read_ignore_file(cls, path):
+        """Patterns from .lmdoignore in path, one per line"""
+        ignore_file = os.path.join(path, cls.IGNORE_FILE)
+        if not os.path.isfile(ignore_file):
+            return []
+
+        with open(ignore_file) as f:
+            lines = [line.strip() for line in f.read().splitlines()]
+
+        return [line for line in lines if line and not line.startswith('#')]
+
+    @classmethod
+    def from_ignore_file(cls, path, patterns=None, exclude=None):
+        """Create filter honouring .lmdoignore in path"""
+        return cls((patterns or []) + cls.read_ignore_file(path), exclude)
+
+    def match(self, name_regex, path_regex, rel_path):
+        """If relative path matches name or path patterns"""
+        rel_path = rel_path.replace(os.sep, '/')
+        if name_regex and name_regex.match(rel_path.split('/')[-1]):
+            return True
+
+        return bool(path_regex and path_regex.match(rel_path))
+
+    def if_dir_excluded(self, rel_path):
+        """If directory relative to top of the tree is excluded"""
+        return self.match(self._dir_name, self._dir_path, rel_path)
+
+    def if_file_excluded(self, rel_path, source_path=None):
+        """If file relative to top of the tree is excluded"""
+        if self.match(self._file_name, self._file_path, rel_path):
+            return True
+
+        return bool(self._source_path and source_path and self._source_path.match(source_path))
+
+    def walk(self, top, followlinks=False):
+        """
+        os.walk with excluded directories pruned and files
+        filtered, entries sorted so walk order is stable.
+        Yields (root, rel_root, dirs, files), dirs can be
+        modified in place to prune further
+        """
+        for root, dirs, files in os.walk(top, followlinks=followlinks):
+            rel_root = os.path.relpath(root, top)
+            if rel_root == '.':
+                rel_root = ''
+
+            dirs[:] = sorted([d for d in dirs if not self.if_dir_excluded(os.path.join(rel_root, d))])
+            files = sorted([f for f in files if not self.if_file_excluded(os.path.join(rel_root, f), os.path.join(root, f))])
+
+            yield root, rel_root, dirs, files
+
+    def copytree_ignore(self, top):
+        """Ignore callable for copytree of top"""
+        def ignore(src, names):
+            rel_root = os.path.relpath(src, top)
+            if rel_root == '.':
+                rel_root = ''
+
+            ignored = set()
+            for name in names:
+                rel_path = os.path.join(rel_root, name)
+                if os.path.isdir(os.path.join(src, name)):
+                    if self.if_dir_excluded(rel_path):
+                        ignored.add(name)
+                elif self.if_file_excluded(rel_path, os.path.join(src, name)):
+                    ignored.add(name)
+
+            return ignored
+
+        return ignore
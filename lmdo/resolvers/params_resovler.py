@@ -15,8 +15,9 @@ class ParamsResolver(Resolver):
     1. If param folder provided, merge all files
     2. If a param file provided, use it
     """
-    def __init__(self, params_path):
+    def __init__(self, params_path, stack_name=None):
         self._params_path = params_path
+        self._stack_name = stack_name
 
     def resolve(self):
         return self.merge()
@@ -30,7 +31,7 @@ class ParamsResolver(Resolver):
         param_convertor = ParamsConvertor()
         env_var_convertor = EnvVarConvertor()
         stack_var_convertor = StackVarConvertor()
-        nested_template_convertor = NestedTemplateUrlConvertor()
+        nested_template_convertor = NestedTemplateUrlConvertor(stack_name=self._stack_name)
 
         env_var_convertor.successor = stack_var_convertor
         stack_var_convertor.successor = nested_template_convertor
@@ -23,12 +23,13 @@ class TemplatesResolver(Resolver):
     YAML_TO = {'!': '^'}
     TO_YAML = {'^': '!'}
 
-    def __init__(self, template_path, repo_path=None, params_path=None):
+    def __init__(self, template_path, repo_path=None, params_path=None, stack_name=None):
         if not os.path.isfile(template_path):
             Oprint.err('Template not found by given path {}'.format(templated_path), 'cloudformation')
 
         self._template_path = template_path
         self._params_path = params_path
+        self._stack_name = stack_name
         # Default to project root if not given
         self._repo_path = repo_path or './'
         self._temp_dir = tempfile.mkdtemp()
@@ -94,7 +95,7 @@ class TemplatesResolver(Resolver):
         # Setup convertor chain
         env_var_convertor = EnvVarConvertor()
         stack_var_convertor = StackVarConvertor()
-        nested_template_convertor = NestedTemplateUrlConvertor()
+        nested_template_convertor = NestedTemplateUrlConvertor(stack_name=self._stack_name)
 
         env_var_convertor.successor = stack_var_convertor
         stack_var_convertor.successor = nested_template_convertor
@@ -0,0 +1,83 @@
+import time
+import threading
+
+from lmdo.oprint import Oprint
+
+
+class TransferStats(object):
+    """
+    Aggregate size and time of uploads, safe to share between
+    threads. Time is wall clock time with at least one upload
+    in flight, so concurrent uploads aren't counted twice
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._files = 0
+            self._bytes = 0
+            self._seconds = 0.0
+            self._active = 0
+            self._busy_since = None
+            self._skipped_files = 0
+            self._skipped_bytes = 0
+
+    def start(self):
+        """An upload begins"""
+        with self._lock:
+            if not self._active:
+                self._busy_since = time.time()
+            self._active += 1
+
+    def finish(self, size=None):
+        """An upload ends, size is None if it failed"""
+        with self._lock:
+            self._active -= 1
+            if not self._active:
+                self._seconds += time.time() - self._busy_since
+                self._busy_since = None
+
+            if size is not None:
+                self._files += 1
+                self._bytes += size
+
+    def add_skipped(self, size):
+        with self._lock:
+            self._skipped_files += 1
+            self._skipped_bytes += size
+
+    def timer(self, size):
+        """Context manager recording one transfer"""
+        return _TransferTimer(self, size)
+
+    def report(self, src='s3'):
+        """Print totals, nothing if there was no transfer"""
+        with self._lock:
+            if not self._files and not self._skipped_files:
+                return False
+
+            mb = self._bytes / 1000000.0
+            throughput = mb / self._seconds if self._seconds else 0.0
+            Oprint.info('Uploaded {} files, {:.1f}MB in {:.1f}s ({:.2f}MB/s), skipped {} unchanged files, {:.1f}MB'.format(
+                self._files, mb, self._seconds, throughput,
+                self._skipped_files, self._skipped_bytes / 1000000.0), src)
+
+        return True
+
+
+class _TransferTimer(object):
+    def __init__(self, stats, size):
+        self._stats = stats
+        self._size = size
+
+    def __enter__(self):
+        self._stats.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stats.finish(self._size if exc_type is None else None)
+
+        return False
@@ -6,12 +6,20 @@ import zipfile
 import re
 import site
 import time
+import stat
 import shutil
+import base64
+import hashlib
+import zlib
 from functools import wraps
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
 
 from botocore.exceptions import ClientError
 
 from lmdo.oprint import Oprint
+from lmdo.config import LMDO_CACHE_DIR, ZIP_STORED_EXTENSIONS
+from lmdo.path_filter import PathFilter
 
 
 """Common utility functions"""
@@ -28,6 +36,12 @@ def mkdir(path, mode=0777):
         return True
     return True
 
+def get_cache_dir(name):
+    """Get lmdo local cache sub directory, create it if doesn't exist"""
+    cache_dir = os.path.join(os.getenv('LMDO_CACHE_DIR', LMDO_CACHE_DIR), name)
+    mkdir(cache_dir)
+    return cache_dir
+
 def zipper(from_path, target_file_name, exclude=None, delete_exist=True, replace_base_path=None):
     """
     Create zipped package
@@ -37,13 +51,44 @@ def zipper(from_path, target_file_name, exclude=None, delete_exist=True, replace
             'file': []
         }
     """
-    # Set compression
-    try:
-        import zlib
-        compression = zipfile.ZIP_DEFLATED
-    except:
-        compression = zipfile.ZIP_STORED
+    to_path = from_path
+    if replace_base_path:
+        for p_th in replace_base_path:
+            if fnmatch.fnmatch(from_path, '*'+p_th.get('from_path')+'*'):
+                to_path = from_path.replace(p_th.get('from_path'), p_th.get('to_path'))
+
+    return zip_sources([{'from_path': from_path, 'to_path': to_path}], target_file_name, exclude, delete_exist)
+
+# Fixed entry timestamp so identical content gives identical packages
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
 
+def zip_sources(sources, target_file_name, exclude=None, delete_exist=True):
+    """
+    Stream files from several locations straight into
+    a zipped package under their archive names, no
+    intermediate copy is made
+
+        sources = [
+            {
+                'from_path': '/dir/or/file',
+                'to_path': '.',
+                'ignore': [],    # PathFilter patterns for this source
+                'shadowed': [],  # top level names provided by an earlier source
+                'exclude': {}    # replace exclude for this source
+            },
+            {
+                'to_path': '__init__.py',
+                'content': ''    # file written from string
+            }
+        ]
+
+    Sources are written in order, a file already
+    in the package takes precedence. Entries are sorted
+    and have fixed timestamps and permissions so the
+    same content always gives the same package.
+    Entries are compressed on a thread pool, sized by
+    environment variable LMDO_ZIP_JOBS or cpu count
+    """
     #delete existing file before writing a new one
     if delete_exist:
         try:
@@ -53,50 +98,143 @@ def zipper(from_path, target_file_name, exclude=None, delete_exist=True, replace
     
     mode = 'a' if not delete_exist else 'w'
     zip_file = zipfile.ZipFile(target_file_name, mode, zipfile.ZIP_DEFLATED)
-   
-    Oprint.info('Start packaging directory {}'.format(from_path), 'lmdo')
-   
-    for root, dirs, files in os.walk(from_path):
-        bp = root
-        if replace_base_path:
-            for p_th in replace_base_path:
-                if fnmatch.fnmatch(root, '*'+p_th.get('from_path')+'*'):
-                    bp = root.replace(p_th.get('from_path'), p_th.get('to_path'))
-
-        if not exclude:
-            for f in files:
-                zip_file.write(os.path.join(root, f), os.path.join(bp, f))
-        else:
+    existing = set(zip_file.namelist())
+    entries = []
+
+    def add(arc_name, src=None, content=None):
+        arc_name = os.path.normpath(arc_name)
+        if arc_name in existing:
+            return False
+
+        entries.append((arc_name, src, content))
+        existing.add(arc_name)
+        return True
+
+    for source in sources:
+        to_path = source.get('to_path', '.')
+
+        if 'content' in source:
+            add(to_path, content=source['content'])
+            continue
+
+        from_path = source['from_path']
+        path_filter = PathFilter(source.get('ignore'), source.get('exclude', exclude))
+
+        Oprint.info('Start packaging {}'.format(from_path), 'lmdo')
+
+        if os.path.isfile(from_path):
+            name = os.path.basename(from_path)
+            if not path_filter.if_file_excluded(name, from_path):
+                add(os.path.join(to_path, name), from_path)
+            continue
+
+        shadowed = set(source.get('shadowed', []))
+        for root, rel_root, dirs, files in path_filter.walk(from_path, followlinks=True):
+            if not rel_root and shadowed:
+                dirs[:] = [d for d in dirs if d not in shadowed]
+                files = [f for f in files if f not in shadowed]
+
             for f in files:
-                excl = False
-                #check if file/folder should be excluded
-                if exclude.get('dir'):
-                    for ex_dir in exclude['dir']:
-                        if fnmatch.fnmatch(root, ex_dir):
-                            excl = True
-                            break
+                add(os.path.join(to_path, rel_root, f), os.path.join(root, f))
 
-                if exclude.get('file'):
-                    for ex_file in exclude['file']:
-                        if fnmatch.fnmatch(f, ex_file):
-                            excl = True
-                            break
+    try:
+        write_zip_entries(zip_file, entries, int(os.getenv('LMDO_ZIP_JOBS', cpu_count())))
+    finally:
+        zip_file.close()
+
+    Oprint.info('Package {} has been created'.format(target_file_name), 'lmdo')
+
+    return True
+
+def compress_zip_entry(entry):
+    """
+    Read and deflate one package entry, returns its ZipInfo
+    with CRC and sizes set and the bytes to write. Already
+    compressed content, content deflate doesn't shrink and
+    content needing zip64 is stored as it is
+    """
+    arc_name, src, content = entry
+
+    executable = False
+    if src is not None:
+        executable = bool(os.stat(src).st_mode & stat.S_IXUSR)
+        with open(src, 'rb') as f:
+            content = f.read()
+
+    zip_info = zipfile.ZipInfo(arc_name, ZIP_DATE_TIME)
+    zip_info.create_system = 3
+    zip_info.external_attr = (stat.S_IFREG | (0755 if executable else 0644)) << 16
+    zip_info.file_size = len(content)
+    zip_info.CRC = zlib.crc32(content) & 0xffffffff
+    zip_info.compress_type = zipfile.ZIP_STORED
+
+    data = content
+    if os.path.splitext(arc_name)[1].lower() not in ZIP_STORED_EXTENSIONS and len(content) <= zipfile.ZIP64_LIMIT:
+        # Raw deflate stream, same as ZipFile uses
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        compressed = compressor.compress(content) + compressor.flush()
+        if len(compressed) < len(content):
+            data = compressed
+            zip_info.compress_type = zipfile.ZIP_DEFLATED
+
+    zip_info.compress_size = len(data)
+
+    return zip_info, data
+
+def write_compressed_zip_entry(zip_file, zip_info, data):
+    """
+    Write an entry from compress_zip_entry. writestr stores
+    the bytes as they are, then its local header is rewritten
+    with the real method, CRC and sizes, ZipInfo in the
+    central directory is the same object
+    """
+    compress_type, file_size, crc = zip_info.compress_type, zip_info.file_size, zip_info.CRC
+    zip_info.compress_type = zipfile.ZIP_STORED
+    zip_file.writestr(zip_info, data)
+    if compress_type == zipfile.ZIP_STORED:
+        return True
 
-                if exclude.get('file_with_path'):
-                    for ex_file in exclude['file_with_path']:
-                        if fnmatch.fnmatch(os.path.join(root, f), ex_file):
-                            excl = True
-                            break
+    zip_info.compress_type = compress_type
+    zip_info.file_size = file_size
+    zip_info.CRC = crc
+    end = zip_file.fp.tell()
+    zip_file.fp.seek(zip_info.header_offset)
+    zip_file.fp.write(zip_info.FileHeader(False))
+    zip_file.fp.seek(end)
 
-                if not excl:                    
-                    zip_file.write(os.path.join(root, f), os.path.join(bp, f))
+    return True
 
-    zip_file.close()
+def write_zip_entries(zip_file, entries, jobs):
+    """
+    Compress entries on a thread pool and write them in order.
+    Done in batches so only a batch is held in memory
+    """
+    if jobs <= 1 or len(entries) <= 1:
+        for entry in entries:
+            write_compressed_zip_entry(zip_file, *compress_zip_entry(entry))
+        return True
 
-    Oprint.info('Finished packaging directory {}. Package {} has been created'.format(from_path, target_file_name), 'lmdo')
+    batch_size = jobs * 16
+    pool = ThreadPool(jobs)
+    try:
+        for start in range(0, len(entries), batch_size):
+            for compressed in pool.map(compress_zip_entry, entries[start:start + batch_size]):
+                write_compressed_zip_entry(zip_file, *compressed)
+    finally:
+        pool.close()
+        pool.join()
 
     return True
 
+def get_file_sha256(file_path):
+    """Base64 encoded SHA-256 of a file, same format as Lambda CodeSha256"""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+
+    return base64.b64encode(sha.digest()).decode('utf-8')
+
 def find_files_by_postfix(path, postfix):
     """Find files with given postfix in path"""
     if type(postfix) == str:
@@ -243,4 +381,59 @@ def class_function_retry(aws_retry_condition=False, tries=3, delay=1, backoff=2)
         return wrapper
     return retry
 
- 
+class TaskFailure(object):
+    """Result of a task that failed inside a worker"""
+    def __init__(self, error):
+        self.error = error
+
+class SafeTask(object):
+    """
+    Wrap a task for pool workers. Oprint.err exits on error
+    which would kill the worker and hang the pool, so turn
+    exits and exceptions into TaskFailure results instead
+    """
+    def __init__(self, func):
+        self._func = func
+
+    def __call__(self, item):
+        try:
+            return self._func(item)
+        except SystemExit as e:
+            if not e.code:
+                return None
+            return TaskFailure('exit with code {}'.format(e.code))
+        except Exception as e:
+            Oprint.err(e, 'lmdo', exit=False)
+            return TaskFailure(str(e))
+
+def parallel_map(func, items, jobs, processes=False):
+    """
+    Map func over items using a pool of jobs workers,
+    results are returned in the order of items.
+    Threads are used unless processes is set, in which
+    case func must be a module level function
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    pool_class = Pool if processes else ThreadPool
+    pool = pool_class(min(jobs, len(items)))
+    try:
+        results = pool.map(SafeTask(func), items)
+    finally:
+        pool.close()
+        pool.join()
+
+    failed = [result for result in results if isinstance(result, TaskFailure)]
+    if failed:
+        Oprint.err('{} of {} parallel tasks failed'.format(len(failed), len(items)), 'lmdo')
+
+    return results
+
+def get_jobs(args):
+    """Number of parallel workers requested from command line"""
+    try:
+        return max(1, int(args.get('--jobs') or 1))
+    except ValueError:
+        Oprint.err('--jobs must be a number', 'lmdo')
@@ -0,0 +1,29 @@
+import threading
+from unittest import TestCase
+
+from lmdo.client_pool import ClientPool
+
+CREDENTIALS = {'aws_access_key_id': 'AKIAFAKE', 'aws_secret_access_key': 'fake', 'region_name': 'ap-southeast-2'}
+
+class TestClientPool(TestCase):
+    """Test shared sessions and clients"""
+    def tearDown(self):
+        ClientPool.clear()
+
+    def test_shared_per_credentials_and_service(self):
+        client = ClientPool.get_client('s3', 25, **CREDENTIALS)
+        self.assertTrue(client is ClientPool.get_client('s3', 25, **CREDENTIALS))
+        self.assertFalse(client is ClientPool.get_client('lambda', 25, **CREDENTIALS))
+        self.assertFalse(client is ClientPool.get_client('s3', 25, **dict(CREDENTIALS, region_name='us-east-1')))
+        self.assertEqual(client.meta.config.max_pool_connections, 25)
+        self.assertTrue(ClientPool.get_session(**CREDENTIALS) is ClientPool.get_session(**CREDENTIALS))
+
+    def test_threads_share_client(self):
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(ClientPool.get_client('cloudformation', 10, **CREDENTIALS))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set([id(client) for client in clients])), 1)
@@ -0,0 +1,61 @@
+import threading
+from unittest import TestCase
+
+from lmdo.cmds.scheduler import Scheduler
+
+class TestScheduler(TestCase):
+    """Test dependency scheduling"""
+    def setUp(self):
+        self.ran = []
+        self.lock = threading.Lock()
+
+    def task(self, name, fail=False):
+        def run():
+            with self.lock:
+                self.ran.append(name)
+            if fail:
+                raise ValueError(name)
+        return run
+
+    def test_requirements_run_first(self):
+        scheduler = Scheduler()
+        scheduler.add('api', self.task('api'), ['lambda'])
+        scheduler.add('lambda', self.task('lambda'), ['stack'])
+        scheduler.add('stack', self.task('stack'))
+        scheduler.add('events', self.task('events'))
+        scheduler.run()
+
+        self.assertEqual(sorted(self.ran), ['api', 'events', 'lambda', 'stack'])
+        self.assertTrue(self.ran.index('stack') < self.ran.index('lambda') < self.ran.index('api'))
+
+    def test_independent_tasks_overlap(self):
+        started = threading.Event()
+        scheduler = Scheduler()
+        scheduler.add('first', lambda: self.assertTrue(started.wait(5)))
+        scheduler.add('second', started.set)
+        scheduler.run()
+
+    def test_failure_skips_dependents(self):
+        scheduler = Scheduler()
+        scheduler.add('stack', self.task('stack', fail=True))
+        scheduler.add('lambda', self.task('lambda'), ['stack'])
+        scheduler.add('events', self.task('events'))
+
+        self.assertRaises(SystemExit, scheduler.run)
+        self.assertEqual(sorted(self.ran), ['events', 'stack'])
+
+    def test_reverse(self):
+        scheduler = Scheduler()
+        scheduler.add('stack', self.task('stack'))
+        scheduler.add('lambda', self.task('lambda'), ['stack'])
+        scheduler.reverse().run()
+
+        self.assertEqual(self.ran, ['lambda', 'stack'])
+
+    def test_circular_dependency(self):
+        scheduler = Scheduler()
+        scheduler.add('a', self.task('a'), ['b'])
+        scheduler.add('b', self.task('b'), ['a'])
+
+        self.assertRaises(SystemExit, scheduler.run)
+        self.assertEqual(self.ran, [])
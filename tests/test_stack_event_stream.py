@@ -0,0 +1,70 @@
+import datetime
+from unittest import TestCase
+
+from botocore.exceptions import ClientError
+
+from lmdo.cmds.cf.stack_event_stream import StackEventStream
+
+def event(number, resource='bucket', status='CREATE_IN_PROGRESS'):
+    return {
+        'EventId': 'event-{}'.format(number),
+        'StackName': 'stack',
+        'LogicalResourceId': resource,
+        'ResourceType': 'AWS::CloudFormation::Stack' if resource == 'stack' else 'AWS::S3::Bucket',
+        'ResourceStatus': status,
+        'Timestamp': datetime.datetime(2020, 1, 1) + datetime.timedelta(seconds=number),
+    }
+
+class FakeClient(object):
+    """Serve events newest first, two per page"""
+    def __init__(self):
+        self.events = []
+        self.calls = 0
+        self.error = None
+
+    def describe_stack_events(self, StackName, NextToken=0):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        events = list(reversed(self.events))[NextToken:NextToken + 2]
+        response = {'StackEvents': events}
+        if NextToken + 2 < len(self.events):
+            response['NextToken'] = NextToken + 2
+        return response
+
+class TestStackEventStream(TestCase):
+    """Test incremental stack event polling"""
+    def setUp(self):
+        self.client = FakeClient()
+        self.stream = StackEventStream(self.client, 'stack', since=datetime.datetime(2020, 1, 1, 0, 0, 1), min_interval=2, max_interval=10)
+
+    def test_only_new_events(self):
+        self.client.events = [event(n) for n in range(5)]
+        self.assertEqual([e['EventId'] for e in self.stream.poll()], ['event-2', 'event-3', 'event-4'])
+
+        self.client.events.append(event(5, 'stack', 'CREATE_COMPLETE'))
+        self.client.calls = 0
+        self.assertEqual([e['EventId'] for e in self.stream.poll()], ['event-5'])
+        # Stops at the page holding the last seen event
+        self.assertEqual(self.client.calls, 1)
+        self.assertEqual(self.stream.status, 'CREATE_COMPLETE')
+        self.assertFalse(self.stream.if_in_progress())
+
+    def test_interval_adapts(self):
+        self.client.events = [event(2, 'stack')]
+        self.stream.poll()
+        self.assertEqual(self.stream.interval, 2)
+        self.assertTrue(self.stream.if_in_progress())
+
+        for _ in range(10):
+            self.assertEqual(self.stream.poll(), [])
+        self.assertEqual(self.stream.interval, 10)
+
+        self.client.events.append(event(3))
+        self.stream.poll()
+        self.assertEqual(self.stream.interval, 2)
+
+    def test_throttling(self):
+        self.client.error = ClientError({'Error': {'Code': 'Throttling', 'Message': 'Rate exceeded'}}, 'DescribeStackEvents')
+        self.assertEqual(self.stream.poll(), [])
+        self.assertEqual(self.stream.interval, 10)
@@ -0,0 +1,56 @@
+import datetime
+from unittest import TestCase
+
+from botocore.exceptions import ClientError
+
+from lmdo.cmds.cf.stack_watcher import StackWatcher
+
+def stack_event(stack_name, status):
+    return {
+        'EventId': '{}-{}'.format(stack_name, status),
+        'StackName': stack_name,
+        'LogicalResourceId': stack_name,
+        'ResourceType': 'AWS::CloudFormation::Stack',
+        'ResourceStatus': status,
+        'Timestamp': datetime.datetime(2020, 1, 1),
+    }
+
+class FakeClient(object):
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def describe_stack_events(self, StackName):
+        self.calls.append(StackName)
+        if StackName not in self.events:
+            raise ClientError({'Error': {'Code': 'ValidationError', 'Message': 'Stack does not exist'}}, 'DescribeStackEvents')
+        return {'StackEvents': self.events[StackName]}
+
+class TestStackWatcher(TestCase):
+    """Test following several stacks at once"""
+    def test_results_per_stack(self):
+        client = FakeClient({
+            'network': [stack_event('network', 'CREATE_COMPLETE')],
+            'database': [stack_event('database', 'UPDATE_ROLLBACK_COMPLETE')],
+        })
+        shown = []
+        watcher = StackWatcher(client, display=lambda name, events: shown.append(name), rate=100)
+        watcher.watch('network').watch('database')
+
+        self.assertEqual(watcher.wait('network'), 'CREATE_COMPLETE')
+        self.assertEqual(watcher.wait('database'), 'UPDATE_ROLLBACK_COMPLETE')
+        self.assertEqual(dict(watcher.results()), {'network': 'CREATE_COMPLETE', 'database': 'UPDATE_ROLLBACK_COMPLETE'})
+        self.assertEqual(sorted(shown), ['database', 'network'])
+        self.assertEqual(len(client.calls), 2)
+
+    def test_lookup_by_stack_id(self):
+        client = FakeClient({'stack-id': [stack_event('app', 'DELETE_COMPLETE')]})
+        watcher = StackWatcher(client, show_events=False, rate=100)
+
+        self.assertEqual(watcher.watch('app', stack_id='stack-id').wait('app'), 'DELETE_COMPLETE')
+        self.assertEqual(client.calls, ['stack-id'])
+
+    def test_failure_ends_watch(self):
+        watcher = StackWatcher(FakeClient({}), show_events=False, rate=100)
+
+        self.assertEqual(watcher.watch('missing').wait('missing'), None)
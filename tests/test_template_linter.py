@@ -0,0 +1,118 @@
+import os
+import json
+import shutil
+import tempfile
+from unittest import TestCase
+
+from lmdo.cmds.cf.template_linter import TemplateLinter
+
+BUCKET = {'Type': 'AWS::S3::Bucket'}
+
+class TestTemplateLinter(TestCase):
+    """Test offline template checks"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, body):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w') as f:
+            f.write(body if isinstance(body, basestring) else json.dumps(body))
+
+        return path
+
+    def lint(self, master, children=None, params=None):
+        templates = {
+            'master': self.write('master.json' if not isinstance(master, basestring) else 'master.yaml', master),
+            'children': [self.write(name, body) for name, body in (children or {}).items()]
+        }
+        linter = TemplateLinter(templates, params=params)
+        linter.lint()
+        return linter
+
+    def test_valid_json(self):
+        linter = self.lint({
+            'Parameters': {'Name': {'Type': 'String'}},
+            'Resources': {'Bucket': {'Type': 'AWS::S3::Bucket', 'Properties': {'BucketName': {'Ref': 'Name'}}}},
+            'Outputs': {'Arn': {'Value': {'Fn::GetAtt': ['Bucket', 'Arn']}}}
+        }, params=[{'ParameterKey': 'Name', 'ParameterValue': 'b'}])
+        self.assertEqual(linter.errors, [])
+
+    def test_json_errors(self):
+        linter = self.lint({
+            'Resource': {},
+            'Resources': {
+                'Bucket': {'Type': 'AWS::S3::Buckett'},
+                'Topic': {'Type': 'AWS::SNS::Topic', 'DependsOn': 'Queue', 'Properties': {'Name': {'Ref': 'Bucke'}}}
+            }
+        })
+        self.assertEqual(len(linter.errors), 4)
+        self.assertTrue('did you mean Resources?' in linter.errors[0])
+
+    def test_yaml_short_forms(self):
+        linter = self.lint('\n'.join([
+            'Parameters:',
+            '  Name: {Type: String}',
+            'Resources:',
+            '  Bucket:',
+            '    Type: AWS::S3::Bucket',
+            '    Properties:',
+            '      BucketName: !Ref Name',
+            '  Topic:',
+            '    Type: AWS::SNS::Topic',
+            '    Properties:',
+            '      TopicName: !GetAtt Bucket.Arn',
+            '      DisplayName: !Join ["-", [!Ref Name, !Ref Missing]]',
+        ]), params=[{'ParameterKey': 'Name', 'ParameterValue': 'b'}])
+        self.assertEqual(len(linter.errors), 1)
+        self.assertTrue('undefined Missing' in linter.errors[0])
+
+    def test_sub_variables(self):
+        linter = self.lint({'Resources': {
+            'Bucket': BUCKET,
+            'Topic': {'Type': 'AWS::SNS::Topic', 'Properties': {
+                'TopicName': {'Fn::Sub': '${AWS::StackName}-${Bucket}-${Bucket.Arn}-${!Literal}'},
+                'DisplayName': {'Fn::Sub': ['${Local}-${Other}', {'Local': 'x'}]}
+            }}
+        }})
+        self.assertEqual(len(linter.errors), 1)
+        self.assertTrue('undefined Other' in linter.errors[0])
+
+    def test_conditions(self):
+        linter = self.lint({
+            'Conditions': {'Prod': {'Fn::Equals': [{'Ref': 'AWS::Region'}, 'us-east-1']}, 'Both': {'Fn::And': [{'Condition': 'Prod'}, {'Condition': 'Dev'}]}},
+            'Resources': {
+                'Bucket': {'Type': 'AWS::S3::Bucket', 'Condition': 'Prod', 'Properties': {'BucketName': {'Fn::If': ['Prod', 'a', 'b']}}},
+                'Topic': {'Type': 'AWS::SNS::Topic', 'Condition': 'Staging'}
+            }
+        })
+        self.assertEqual(len(linter.errors), 2)
+        self.assertTrue('condition Dev' in linter.errors[0] or 'condition Dev' in linter.errors[1])
+
+    def test_nested_stack_parameters(self):
+        linter = self.lint({'Resources': {'Child': {'Type': 'AWS::CloudFormation::Stack', 'Properties': {
+            'TemplateURL': 'https://s3.amazonaws.com/bucket/stack/child.json',
+            'Parameters': {'Name': 'a', 'Unknown': 'b'}
+        }}}}, children={'child.json': {
+            'Parameters': {'Name': {'Type': 'String'}, 'Env': {'Type': 'String', 'AllowedValues': ['dev']}},
+            'Resources': {'Bucket': BUCKET}
+        }})
+        self.assertEqual(len(linter.errors), 2)
+        self.assertTrue([error for error in linter.errors if 'parameter Unknown' in error])
+        self.assertTrue([error for error in linter.errors if 'parameter Env has no Default' in error])
+
+    def test_transform(self):
+        linter = self.lint('\n'.join([
+            'Transform: AWS::Serverless-2016-10-31',
+            'Globals:',
+            '  Function: {Timeout: 10}',
+            'Resources:',
+            '  Function:',
+            '    Type: AWS::Serverless::Function',
+            '    Properties:',
+            '      Role: !GetAtt FunctionRole.Arn',
+        ]))
+        self.assertEqual(linter.errors, [])
+        self.assertEqual(linter.warnings, [])
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from lmdo import transfer_stats
+from lmdo.transfer_stats import TransferStats
+
+class FakeTime(object):
+    now = 0.0
+
+    @classmethod
+    def time(cls):
+        return cls.now
+
+class TestTransferStats(TestCase):
+    """Test upload totals"""
+    def setUp(self):
+        self.time = transfer_stats.time
+        transfer_stats.time = FakeTime
+
+    def tearDown(self):
+        transfer_stats.time = self.time
+
+    def test_concurrent_uploads_count_wall_time(self):
+        stats = TransferStats()
+        FakeTime.now = 0.0
+        first = stats.timer(1000000).__enter__()
+        FakeTime.now = 1.0
+        second = stats.timer(1000000).__enter__()
+        FakeTime.now = 4.0
+        first.__exit__(None, None, None)
+        FakeTime.now = 5.0
+        second.__exit__(None, None, None)
+
+        # Nothing in flight between uploads isn't counted
+        FakeTime.now = 100.0
+        with stats.timer(2000000):
+            FakeTime.now = 103.0
+
+        self.assertEqual(stats._files, 3)
+        self.assertEqual(stats._bytes, 4000000)
+        self.assertEqual(stats._seconds, 8.0)
+
+    def test_failed_upload_isnt_counted(self):
+        stats = TransferStats()
+        FakeTime.now = 0.0
+        try:
+            with stats.timer(1000):
+                FakeTime.now = 2.0
+                raise IOError('failed')
+        except IOError:
+            pass
+
+        self.assertEqual((stats._files, stats._bytes, stats._seconds), (0, 0, 2.0))
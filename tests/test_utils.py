@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+import zipfile
+import threading
+from unittest import TestCase
+
+from lmdo import utils
+from lmdo.utils import zip_sources, get_file_sha256
+from lmdo.path_filter import PathFilter
+from lmdo.config import LAMBDA_EXCLUDE
+
+class TestZipSources(TestCase):
+    """Test packaging"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, 'src')
+        os.makedirs(os.path.join(self.src, 'pkg'))
+        for name in ['b.py', 'a.py', os.path.join('pkg', 'c.py')]:
+            with open(os.path.join(self.src, name), 'w') as f:
+                f.write(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def zip(self, name, sources):
+        target = os.path.join(self.tmp, name)
+        zip_sources(sources, target)
+        return target
+
+    def test_same_content_gives_same_package(self):
+        first = self.zip('first.zip', [{'from_path': self.src}])
+        os.utime(os.path.join(self.src, 'a.py'), (0, 0))
+        second = self.zip('second.zip', [{'from_path': self.src}])
+
+        self.assertEqual(get_file_sha256(first), get_file_sha256(second))
+        self.assertEqual(zipfile.ZipFile(first).namelist(), ['a.py', 'b.py', 'pkg/c.py'])
+
+    def test_parallel_gives_same_package(self):
+        with open(os.path.join(self.src, 'data.zip'), 'wb') as f:
+            f.write(os.urandom(1024))
+
+        os.environ['LMDO_ZIP_JOBS'] = '1'
+        try:
+            first = self.zip('first.zip', [{'from_path': self.src}])
+            os.environ['LMDO_ZIP_JOBS'] = '4'
+            second = self.zip('second.zip', [{'from_path': self.src}])
+        finally:
+            del os.environ['LMDO_ZIP_JOBS']
+
+        with open(first, 'rb') as f1, open(second, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+        self.assertEqual(zipfile.ZipFile(second).read('pkg/c.py'), b'pkg/c.py')
+
+    def test_entries_are_compressed_by_workers(self):
+        with open(os.path.join(self.src, 'big.py'), 'w') as f:
+            f.write('x = 1\n' * 1000)
+        with open(os.path.join(self.src, 'random.bin'), 'wb') as f:
+            f.write(os.urandom(1024))
+
+        compressed = {}
+        compress_zip_entry = utils.compress_zip_entry
+        def compress(entry):
+            zip_info, data = compress_zip_entry(entry)
+            compressed[zip_info.filename] = (threading.current_thread().name, zip_info.compress_type, zip_info.compress_size)
+            return zip_info, data
+
+        os.environ['LMDO_ZIP_JOBS'] = '4'
+        utils.compress_zip_entry = compress
+        try:
+            target = self.zip('package.zip', [{'from_path': self.src}])
+        finally:
+            utils.compress_zip_entry = compress_zip_entry
+            del os.environ['LMDO_ZIP_JOBS']
+
+        package = zipfile.ZipFile(target)
+        self.assertEqual(package.testzip(), None)
+        self.assertEqual(package.read('big.py'), b'x = 1\n' * 1000)
+        for zip_info in package.infolist():
+            thread_name, compress_type, compress_size = compressed[zip_info.filename]
+            self.assertNotEqual(thread_name, threading.current_thread().name)
+            self.assertEqual((zip_info.compress_type, zip_info.compress_size), (compress_type, compress_size))
+
+        self.assertEqual(package.getinfo('big.py').compress_type, zipfile.ZIP_DEFLATED)
+        # Deflate doesn't shrink random content
+        self.assertEqual(package.getinfo('random.bin').compress_type, zipfile.ZIP_STORED)
+
+    def test_earlier_source_takes_precedence(self):
+        target = self.zip('package.zip', [
+            {'to_path': 'a.py', 'content': 'first'},
+            {'from_path': self.src, 'shadowed': ['pkg']}
+        ])
+
+        package = zipfile.ZipFile(target)
+        self.assertEqual(package.read('a.py'), b'first')
+        self.assertEqual(sorted(package.namelist()), ['a.py', 'b.py'])
+
+class TestPathFilter(TestCase):
+    """Test exclusion matching"""
+    def test_patterns(self):
+        path_filter = PathFilter(['build/', '/docs', 'pkg/*.txt'], {'dir': ['tests'], 'file': ['*.pyc']})
+
+        self.assertTrue(path_filter.if_dir_excluded('build'))
+        self.assertFalse(path_filter.if_file_excluded('build'))
+        self.assertTrue(path_filter.if_dir_excluded(os.path.join('app', 'tests')))
+        self.assertTrue(path_filter.if_dir_excluded('docs'))
+        self.assertFalse(path_filter.if_dir_excluded(os.path.join('app', 'docs')))
+        self.assertTrue(path_filter.if_file_excluded(os.path.join('pkg', 'a.txt')))
+        self.assertFalse(path_filter.if_file_excluded('a.txt'))
+        self.assertTrue(path_filter.if_file_excluded(os.path.join('app', 'a.pyc')))
+
+    def test_project_only_excludes_are_anchored(self):
+        path_filter = PathFilter(exclude=LAMBDA_EXCLUDE)
+
+        for path in ['tests', 'cloudformation', 'swagger', '.lmdo']:
+            self.assertTrue(path_filter.if_dir_excluded(path))
+        for path in ['moto/cloudformation', 'awscli/customizations/cloudformation', 'flasgger/swagger', 'pkg/tests']:
+            self.assertFalse(path_filter.if_dir_excluded(os.path.join(*path.split('/'))))
+
+    def test_dependency_subpackages_survive_packaging(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            for path in ['tests', os.path.join('moto', 'cloudformation'), os.path.join('flasgger', 'swagger')]:
+                os.makedirs(os.path.join(tmp, 'src', path))
+                with open(os.path.join(tmp, 'src', path, '__init__.py'), 'w') as f:
+                    f.write('')
+
+            target = os.path.join(tmp, 'package.zip')
+            zip_sources([{'from_path': os.path.join(tmp, 'src')}], target, LAMBDA_EXCLUDE)
+            self.assertEqual(zipfile.ZipFile(target).namelist(), ['flasgger/swagger/__init__.py', 'moto/cloudformation/__init__.py'])
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_walk_prunes_excluded_directories(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            for path in ['keep', os.path.join('node_modules', 'dep')]:
+                os.makedirs(os.path.join(tmp, path))
+            with open(os.path.join(tmp, PathFilter.IGNORE_FILE), 'w') as f:
+                f.write('# dependencies\nnode_modules/\n')
+
+            walked = [rel_root for root, rel_root, dirs, files in PathFilter.from_ignore_file(tmp).walk(tmp)]
+            self.assertEqual(walked, ['', 'keep'])
+        finally:
+            shutil.rmtree(tmp)
@@ -0,0 +1,57 @@
+import os
+import time
+import shutil
+import tempfile
+from unittest import TestCase
+
+from lmdo.cmds.lm.wheelhouse import Wheelhouse
+from lmdo.config import WHEELHOUSE_TTL
+
+class FakeWheelhouse(Wheelhouse):
+    """Wheelhouse recording pip calls instead of running them"""
+    def __init__(self, cache_dir, results):
+        super(FakeWheelhouse, self).__init__(cache_dir)
+        self.results = results
+        self.calls = []
+
+    def pip(self, args):
+        self.calls.append(args[0])
+        return self.results.pop(0)
+
+class TestWheelhouse(TestCase):
+    """Test wheel reuse"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_unpinned_requirements_expire(self):
+        wheelhouse = Wheelhouse(self.tmp)
+        pinned = ['Flask==1.0.2', 'requests[security] == 2.20.0']
+        unpinned = ['werkzeug', 'base58>=1.0']
+        self.assertTrue(Wheelhouse.if_pinned(pinned))
+        self.assertFalse(Wheelhouse.if_pinned(unpinned))
+        self.assertFalse(Wheelhouse.if_pinned(['six==1.*']))
+
+        for requirements in [pinned, unpinned]:
+            marker = wheelhouse.get_marker(wheelhouse.get_key(requirements))
+            open(marker, 'w').close()
+            self.assertTrue(wheelhouse.has(requirements))
+            expired = time.time() - WHEELHOUSE_TTL - 1
+            os.utime(marker, (expired, expired))
+
+        self.assertTrue(wheelhouse.has(pinned))
+        self.assertFalse(wheelhouse.has(unpinned))
+
+    def test_refetch_when_wheels_are_missing(self):
+        wheelhouse = FakeWheelhouse(self.tmp, [False, True, True])
+        open(wheelhouse.get_marker(wheelhouse.get_key(['six==1.11.0'])), 'w').close()
+
+        wheelhouse.install(['six==1.11.0'], self.tmp)
+        self.assertEqual(wheelhouse.calls, ['install', 'wheel', 'install'])
+
+    def test_no_refetch_after_fresh_fetch(self):
+        wheelhouse = FakeWheelhouse(self.tmp, [True, False])
+        self.assertRaises(SystemExit, wheelhouse.install, ['six==1.11.0'], self.tmp)
+        self.assertEqual(wheelhouse.calls, ['wheel', 'install'])